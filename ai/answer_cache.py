@@ -0,0 +1,252 @@
+"""
+Semantic cache for LLM fallback answers.
+
+Questions that miss the FAQs are answered by the LLM; at live events the same
+few questions arrive again with small transcription differences. Answers are
+cached under the normalized question and matched by cosine similarity of
+hashed word and character n-grams - a fixed feature space, so words outside
+the FAQ vocabulary still count - plus a content-word overlap check, so a
+reworded repeat is answered locally but a question that only shares a topic
+word with a cached one is not. Entries
+expire after a TTL, the cache is bounded (LRU) and it is persisted to disk so
+it survives restarts.
+"""
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterator, Optional
+
+import numpy as np
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+from config import (
+    ANSWER_CACHE_FILE, ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL, ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_MIN_OVERLAP
+)
+from .hashing_index import hash_texts
+from utils.lazy import Lazy
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+SAVE_DELAY = 2.0  # Seconds to batch writes before the cache file is rewritten
+_NON_WORD = re.compile(r'[^\w\s]+', re.UNICODE)
+_TERM = re.compile(r'\b\w\w+\b', re.UNICODE)  # Same tokens as the n-gram vectorizers
+# sklearn's list misses a few auxiliaries and contractions common in spoken questions
+_STOP_WORDS = ENGLISH_STOP_WORDS | {"does", "did", "doing", "whats", "wheres", "whos", "hows", "lets"}
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return ' '.join(_NON_WORD.sub(' ', question.lower()).split())
+
+
+def content_terms(text: str) -> frozenset:
+    """Words of a normalized question that carry meaning (stop words and 1-letter tokens dropped)"""
+    return frozenset(term for term in _TERM.findall(text) if term not in _STOP_WORDS)
+
+
+def term_overlap(a: frozenset, b: frozenset) -> float:
+    """Shared content words relative to the larger set (1.0 when neither has any)"""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / max(len(a), len(b))
+
+
+def replay_chunks(text: str, words_per_chunk: int = 4) -> Iterator[str]:
+    """Yield a cached answer in small chunks, like a streamed LLM response"""
+    words = re.findall(r'\S+\s*', text)
+    for start in range(0, len(words), words_per_chunk):
+        yield ''.join(words[start:start + words_per_chunk])
+
+
+class AnswerCache:
+    def __init__(self, path: Optional[str] = ANSWER_CACHE_FILE, max_size: int = ANSWER_CACHE_SIZE,
+                 ttl: Optional[float] = ANSWER_CACHE_TTL, threshold: float = ANSWER_CACHE_THRESHOLD,
+                 min_overlap: float = ANSWER_CACHE_MIN_OVERLAP):
+        """
+        Args:
+            path: JSON file the cache is persisted to (None keeps it in memory only)
+            max_size: Maximum number of answers before the least recently used is evicted
+            ttl: Seconds an answer stays valid (None disables expiry)
+            threshold: Minimum cosine similarity (hashed n-grams) for a reworded question to match
+            min_overlap: Minimum share of content words the two questions must have in common
+        """
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self.threshold = threshold
+        self.min_overlap = min_overlap
+        self._entries = OrderedDict()  # {normalized question: {"answer", "context", "created"}}
+        self._vectors = None  # (keys, CSR matrix) for the similarity scan
+        self._lock = threading.Lock()
+        self._save_timer = None
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._load()
+
+    def _load(self):
+        """Read persisted answers, skipping expired ones"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                entries = json.load(f).get("answers", {})
+        except Exception as e:
+            logger.warning("Ignoring unreadable answer cache at %s: %s", self.path, e)
+            return
+        now = time.time()
+        for key, entry in entries.items():
+            if not self.ttl or entry["created"] + self.ttl > now:
+                self._entries[key] = entry
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        if self._entries:
+            logger.info("Loaded %s cached answers from %s", len(self._entries), self.path)
+
+    def _schedule_save(self):
+        """Rewrite the cache file shortly, coalescing bursts of puts into one write"""
+        if not self.path or self._save_timer is not None:
+            return
+        self._save_timer = threading.Timer(SAVE_DELAY, self.save)
+        self._save_timer.daemon = True
+        self._save_timer.start()
+
+    def save(self):
+        """Atomically write the cache to disk"""
+        with self._lock:
+            self._save_timer = None
+            raw = json.dumps({"answers": self._entries})
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(raw)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error("Error saving answer cache: %s", e)
+
+    def _expire(self, now: float):
+        if not self.ttl:
+            return
+        expired = [key for key, entry in self._entries.items() if entry["created"] + self.ttl <= now]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self.expirations += len(expired)
+            self._vectors = None
+
+    def get(self, question: str, context: str = "") -> Optional[str]:
+        """
+        Find a cached answer for a question or a close rewording of it.
+
+        Args:
+            question: User question
+            context: Key of the prompt the answer must have been generated with
+                (e.g. a system prompt hash); answers from a different prompt never match
+
+        Returns:
+            Cached answer, or None on a miss
+        """
+        key = normalize_question(question)
+        if not key:
+            return None
+
+        with self._lock:
+            self._expire(time.time())
+            entry = self._entries.get(key)
+            if entry is not None and entry["context"] == context:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry["answer"]
+            if not self._entries:
+                self.misses += 1
+                return None
+            vectors = self._vectors
+
+        keys = []
+        try:
+            query = hash_texts([key])
+            if vectors is None:
+                with self._lock:
+                    keys = list(self._entries.keys())
+                vectors = (keys, hash_texts(keys))
+                with self._lock:
+                    self._vectors = vectors
+            keys, matrix = vectors
+            scores = (matrix @ query.T).toarray().ravel()
+        except Exception as e:
+            logger.error("Error in answer cache similarity lookup: %s", e)
+            scores = np.zeros(0)
+
+        terms = content_terms(key)
+        with self._lock:
+            for idx in np.argsort(-scores):
+                if scores[idx] < self.threshold:
+                    break
+                if term_overlap(terms, content_terms(keys[idx])) < self.min_overlap:
+                    continue  # Similar wording, different subject
+                entry = self._entries.get(keys[idx])
+                if entry is not None and entry["context"] == context:
+                    self._entries.move_to_end(keys[idx])
+                    self.similar_hits += 1
+                    return entry["answer"]
+            self.misses += 1
+            return None
+
+    def put(self, question: str, answer: str, context: str = ""):
+        """Cache an LLM answer, evicting the least recently used entries beyond max_size"""
+        key = normalize_question(question)
+        if not key or not answer.strip() or self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = {"answer": answer, "context": context, "created": time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._vectors = None
+            self._schedule_save()
+
+    def clear(self):
+        """Drop every cached answer (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._vectors = None
+            self._schedule_save()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """Return size and hit/miss/eviction counters"""
+        lookups = self.hits + self.similar_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "threshold": self.threshold,
+            "min_overlap": self.min_overlap,
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.similar_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+# Global instance, loaded on first use
+_answer_cache = Lazy(AnswerCache, "answer_cache")
+
+
+def get_answer_cache() -> AnswerCache:
+    """Return the shared AnswerCache, loading it from disk on first call"""
+    return _answer_cache.get()
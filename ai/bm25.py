@@ -0,0 +1,251 @@
+"""
+Inverted-index BM25 retrieval.
+
+Postings are kept per term (document ids in insertion order, so they are
+always sorted) and scoring only touches documents that share a query term.
+
+Top-k is MaxScore at term granularity. The query's rarer terms are scored
+exhaustively into a preallocated dense accumulator indexed by document id (no
+per-query merging of id lists). If the k-th best of those partial scores
+already exceeds what the common terms could add to any document, the common
+terms - whose postings can cover most of the corpus - are only looked up for
+the surviving candidates. Otherwise every document is scored: terms that occur
+in a large share of the corpus keep a dense per-document column, so this is a
+few contiguous vector additions rather than a scatter of their postings.
+Results are exact.
+"""
+import math
+import re
+import threading
+from array import array
+from typing import Iterable, List, Tuple
+
+import numpy as np
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+_TOKEN = re.compile(r'(?u)\b\w\w+\b')
+HEAVY_DF = 4096  # Terms in at least this many documents...
+HEAVY_RATIO = 1 / 32  # ...and this share of the corpus are only looked up when MaxScore allows
+DENSE_RATIO = 1 / 8  # Terms in at least this share of the corpus also keep a dense per-document column
+SAMPLE_STRIDE = 64  # Every n-th document estimates the top-k cutoff of an exhaustive query
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without English stop words"""
+    return [t for t in _TOKEN.findall(text.lower()) if t not in ENGLISH_STOP_WORDS]
+
+
+class _Postings:
+    """numpy copy of one term's postings, scored for the current average document length"""
+
+    __slots__ = ("ids", "tfs", "part", "max_part", "avg_len", "_column")
+
+    def __init__(self, ids: np.ndarray, tfs: np.ndarray):
+        self.ids = ids
+        self.tfs = tfs
+        self.part = None  # BM25 term-frequency part per posting; a query scales it by the IDF
+        self.max_part = 0.0
+        self.avg_len = None
+        self._column = None
+
+    def rescore(self, k1: float, b: float, lengths: np.ndarray, avg_len: float):
+        tfs = self.tfs
+        self.part = tfs * (k1 + 1.0) / (tfs + k1 * (1.0 - b + b * lengths[self.ids] / avg_len))
+        self.max_part = float(self.part.max())
+        self.avg_len = avg_len
+        self._column = None
+
+    def column(self, num_docs: int, idf: float) -> np.ndarray:
+        """idf-scaled tf parts as a dense array over all documents (0 where the term does not occur)"""
+        if self._column is None or self._column[0] != (num_docs, idf):
+            column = np.zeros(num_docs)
+            column[self.ids] = idf * self.part
+            self._column = ((num_docs, idf), column)
+        return self._column[1]
+
+    def lookup(self, doc_ids: np.ndarray) -> np.ndarray:
+        """tf parts for the given documents (0 where the term does not occur)"""
+        pos = np.searchsorted(self.ids, doc_ids)
+        pos[pos >= len(self.ids)] = 0
+        return np.where(self.ids[pos] == doc_ids, self.part[pos], 0.0)
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization strength
+        """
+        self.k1 = k1
+        self.b = b
+        self._doc_ids = {}  # {term: array of doc ids}
+        self._tfs = {}  # {term: array of term frequencies}
+        self._doc_len = array('I')
+        self._total_len = 0
+        self._frozen = {}  # {term: _Postings}, dropped when the term gets new postings
+        self._frozen_len = None
+        self._acc = None  # Dense score accumulator, all zeros between queries
+        self._scratch = None  # Per-document scores of exhaustive queries
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def add(self, texts: Iterable[str]) -> None:
+        """Append documents; ids continue from the current document count"""
+        with self._lock:
+            for text in texts:
+                doc_id = len(self._doc_len)
+                counts = {}
+                tokens = tokenize(text)
+                for token in tokens:
+                    counts[token] = counts.get(token, 0) + 1
+                length = max(len(tokens), 1)
+                self._doc_len.append(length)
+                self._total_len += length
+
+                for term, tf in counts.items():
+                    if term not in self._doc_ids:
+                        self._doc_ids[term] = array('I')
+                        self._tfs[term] = array('I')
+                    self._doc_ids[term].append(doc_id)
+                    self._tfs[term].append(tf)
+                    self._frozen.pop(term, None)
+            self._frozen_len = None
+
+    def _postings(self, term: str, avg_len: float) -> _Postings:
+        postings = self._frozen.get(term)
+        if postings is None:
+            postings = self._frozen[term] = _Postings(
+                np.array(self._doc_ids[term], dtype=np.int64),
+                np.array(self._tfs[term], dtype=np.float64)
+            )
+        if postings.avg_len != avg_len:  # Documents were added since it was scored
+            postings.rescore(self.k1, self.b, self._lengths(), avg_len)
+        return postings
+
+    def _lengths(self) -> np.ndarray:
+        if self._frozen_len is None:
+            self._frozen_len = np.array(self._doc_len, dtype=np.float64)
+        return self._frozen_len
+
+    def top_k(self, text: str, k: int = 1, normalize: bool = True) -> List[Tuple[int, float]]:
+        """
+        Return the best k documents for a query.
+
+        Args:
+            text: Query text
+            k: Number of results
+            normalize: Divide scores by the summed IDF of the matched query terms,
+                so a document containing every term once at average length scores ~1.0
+                and thresholds are comparable to cosine similarity
+
+        Returns:
+            (doc id, score) pairs, best first
+        """
+        with self._lock:
+            num_docs = len(self._doc_len)
+            terms = [t for t in set(tokenize(text)) if t in self._doc_ids]
+            if not num_docs or not terms or k <= 0:
+                return []
+
+            avg_len = self._total_len / num_docs
+            plan = []  # (idf, postings)
+            for term in terms:
+                df = len(self._doc_ids[term])
+                plan.append((math.log(1.0 + (num_docs - df + 0.5) / (df + 0.5)), self._postings(term, avg_len)))
+            heavy_df = max(HEAVY_DF, int(num_docs * HEAVY_RATIO))
+            light = [(idf, p) for idf, p in plan if len(p.ids) < heavy_df]
+            heavy = sorted(((idf, p) for idf, p in plan if len(p.ids) >= heavy_df),
+                           key=lambda term: -term[0] * term[1].max_part)
+            # bounds[j] = most that common terms j.. can add to any document's score
+            bounds = [0.0] * (len(heavy) + 1)
+            for j in range(len(heavy) - 1, -1, -1):
+                bounds[j] = bounds[j + 1] + heavy[j][0] * heavy[j][1].max_part
+
+            # Every document with a rare term is a candidate
+            cand_ids, cand_scores = self._accumulate(light, num_docs)
+            threshold = _kth_largest(cand_scores, k)
+            if len(cand_ids) >= k and bounds[0] <= threshold:
+                # MaxScore: documents without a rare term cannot reach the top k, so the
+                # common terms are only looked up for candidates that still can
+                for j, (idf, postings) in enumerate(heavy):
+                    keep = cand_scores + bounds[j] >= threshold
+                    cand_ids, cand_scores = cand_ids[keep], cand_scores[keep]
+                    cand_scores += idf * postings.lookup(cand_ids)
+                    threshold = _kth_largest(cand_scores, k)
+                top_ids, top_scores = _best(cand_ids, cand_scores, k)
+            else:
+                # Common terms decide the ranking: score every document that has any query term
+                top_ids, top_scores = self._score_all(plan, num_docs, k)
+
+            order = np.argsort(-top_scores, kind='stable')
+            results = [(int(top_ids[j]), float(top_scores[j])) for j in order]
+            if normalize:
+                total_idf = sum(idf for idf, _ in plan)
+                results = [(doc, min(score / total_idf, 1.0)) for doc, score in results]
+            return results
+
+    def _accumulate(self, terms: List[Tuple[float, _Postings]], num_docs: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Score every posting of the given terms; returns (unique doc ids, scores)"""
+        if not terms:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        if len(terms) == 1:
+            idf, postings = terms[0]
+            return postings.ids, idf * postings.part
+
+        if self._acc is None or len(self._acc) < num_docs:
+            self._acc = np.zeros(num_docs)
+        acc = self._acc
+        seen = []  # Doc ids first scored by each term; together every touched doc exactly once
+        try:
+            for idf, postings in terms:
+                ids = postings.ids
+                seen.append(ids[acc[ids] == 0.0])  # Every contribution is > 0
+                acc[ids] += idf * postings.part
+            cand_ids = np.concatenate(seen)
+            return cand_ids, acc[cand_ids]
+        finally:
+            for ids in seen:
+                acc[ids] = 0.0
+
+    def _score_all(self, terms: List[Tuple[float, _Postings]], num_docs: int,
+                   k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Exhaustive top k over a per-document score array; terms in much of the corpus are added as columns"""
+        dense = [(idf, p) for idf, p in terms if len(p.ids) >= num_docs * DENSE_RATIO]
+        sparse = [(idf, p) for idf, p in terms if len(p.ids) < num_docs * DENSE_RATIO]
+        if not dense and sum(len(p.ids) for _, p in sparse) < num_docs * DENSE_RATIO:
+            return _best(*self._accumulate(terms, num_docs), k)
+
+        if self._scratch is None or len(self._scratch) < num_docs:
+            self._scratch = np.empty(num_docs)
+        scores = self._scratch[:num_docs]
+        if dense:
+            np.copyto(scores, dense[0][1].column(num_docs, dense[0][0]))
+            for idf, postings in dense[1:]:
+                np.add(scores, postings.column(num_docs, idf), out=scores)
+        else:
+            scores.fill(0.0)
+        for idf, postings in sparse:
+            scores[postings.ids] += idf * postings.part  # Ids are unique within a term
+        # The k-th best of a sample is a lower bound for the k-th best overall; selecting
+        # among the few documents above it avoids a partition of the whole corpus
+        floor = _kth_largest(scores[::SAMPLE_STRIDE], k)
+        top = np.flatnonzero(scores >= floor) if floor > 0 else np.flatnonzero(scores)
+        return _best(top, scores[top], k)
+
+
+def _best(ids: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """The k highest-scoring (ids, scores), unordered"""
+    if len(ids) <= k:
+        return ids, scores
+    top = np.argpartition(-scores, k - 1)[:k]
+    return ids[top], scores[top]
+
+
+def _kth_largest(scores: np.ndarray, k: int) -> float:
+    """k-th largest score, or 0.0 when there are fewer than k"""
+    if len(scores) < k:
+        return 0.0
+    return float(np.partition(scores, len(scores) - k)[len(scores) - k])
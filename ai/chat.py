@@ -1,17 +1,104 @@
-from openai import OpenAI
-from config import OPENAI_API_KEY, OPENAI_MODEL_CHAT, SYSTEM_PROMPT, MAX_TOKENS, TEMPERATURE, HTTP_TIMEOUT, MAX_RETRIES
-from .knowledge import simple_rag_lookup, faq_system
+import asyncio
+import hashlib
 
-client = OpenAI(
-    api_key=OPENAI_API_KEY,
-    timeout=HTTP_TIMEOUT,
-    max_retries=MAX_RETRIES
-)
+from config import OPENAI_API_KEY, OPENAI_BASE_URL, OPENAI_MODEL_CHAT, SYSTEM_PROMPT, MAX_TOKENS, TEMPERATURE, HTTP_TIMEOUT, MAX_RETRIES, FAQ_PRERENDER_ON_ADD
+from utils.lazy import Lazy
+from utils.metrics import ANSWER_CACHE_LOOKUPS, FAQ_LOOKUPS, LLMStreamTimer, span
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# Heavy dependencies (openai, numpy, scikit-learn, the FAQ index) load on first use,
+# so importing this module is cheap; app.py warms them up at startup.
+
+
+def _create_client():
+    from openai import OpenAI
+    return OpenAI(
+        api_key=OPENAI_API_KEY,
+        base_url=OPENAI_BASE_URL,
+        timeout=HTTP_TIMEOUT,
+        max_retries=MAX_RETRIES
+    )
+
+_client = Lazy(_create_client, "chat_client")
+
+
+def get_client():
+    """Return the shared OpenAI chat client, creating it on first use"""
+    return _client.get()
+
+
+def _create_async_client():
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(
+        api_key=OPENAI_API_KEY,
+        base_url=OPENAI_BASE_URL,
+        timeout=HTTP_TIMEOUT,
+        max_retries=MAX_RETRIES
+    )
+
+_async_client = Lazy(_create_async_client, "async_chat_client")
+
+
+def get_async_client():
+    """Return the shared AsyncOpenAI chat client, creating it on first use"""
+    return _async_client.get()
+
+
+def _prepare_answer(question: str, system_prompt: str):
+    """
+    Resolve a question locally if possible, otherwise build the grounded LLM prompt.
+    
+    Blocking (FAQ scoring, answer cache, passage retrieval): async callers run it in a thread.
+    
+    Returns:
+        ("faq", answer), ("cache", answer) or ("llm", messages)
+    """
+    from .answer_cache import get_answer_cache
+    from .knowledge import simple_rag_lookup
+    from .passages import retrieve_context
+    
+    logger.debug("Checking knowledge base...")
+    
+    with span("faq_lookup"):
+        faq_answer = simple_rag_lookup(question)
+    FAQ_LOOKUPS.inc(result="hit" if faq_answer else "miss")
+    if faq_answer:
+        logger.debug("Found a match in the knowledge base.")
+        return "faq", faq_answer
+
+    with span("answer_cache"):
+        cached_answer = get_answer_cache().get(question, _prompt_key(system_prompt))
+    ANSWER_CACHE_LOOKUPS.inc(result="hit" if cached_answer else "miss")
+    if cached_answer:
+        logger.debug("Found a cached answer for a similar question.")
+        return "cache", cached_answer
+
+    logger.debug("No match found. Querying OpenAI model...")
+    
+    messages = [{"role": "system", "content": system_prompt}]
+    with span("retrieval"):
+        context = retrieve_context(question)
+    if context:
+        messages.append({"role": "system", "content": f"Relevant knowledge base excerpts:\n{context}"})
+    messages.append({"role": "user", "content": question})
+    return "llm", messages
+
+
+def _prompt_key(system_prompt: str) -> str:
+    return hashlib.sha256(system_prompt.encode()).hexdigest()[:16]
+
+
+def _cache_answer(question: str, answer: str, system_prompt: str):
+    from .answer_cache import get_answer_cache
+    get_answer_cache().put(question, answer, _prompt_key(system_prompt))  # Only complete answers are cached
 
 
 def ask_chatgpt_stream(question: str, system_prompt: str = SYSTEM_PROMPT):
     """
     Queries the knowledge base first, falling back to a streaming OpenAI call if no match is found.
+    The fallback prompt is grounded with the most relevant knowledge passages.
 
     This function is a generator that yields response chunks as they are received.
     
@@ -22,38 +109,94 @@ def ask_chatgpt_stream(question: str, system_prompt: str = SYSTEM_PROMPT):
     Yields:
         str: Chunks of the generated response.
     """
-    print("INFO: Checking knowledge base...")
+    from .answer_cache import replay_chunks
     
-    faq_answer = simple_rag_lookup(question)
-    if faq_answer:
-        print("INFO: Found a match in the knowledge base.")
-        yield faq_answer
+    source, result = _prepare_answer(question, system_prompt)
+    if source == "faq":
+        yield result
+        return
+    if source == "cache":
+        yield from replay_chunks(result)
         return
-
-    print("INFO: No match found. Querying OpenAI model...")
-    
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": question}
-    ]
     
+    timer = LLMStreamTimer()
+    failed = False
     try:
-        stream = client.chat.completions.create(
+        stream = get_client().chat.completions.create(
             model=OPENAI_MODEL_CHAT,
-            messages=messages,
+            messages=result,
             max_tokens=MAX_TOKENS,
             temperature=TEMPERATURE,
             stream=True
         )
         
-        print("INFO: OpenAI stream initiated...")
+        logger.debug("OpenAI stream initiated...")
+        parts = []
         for chunk in stream:
             content = chunk.choices[0].delta.content
             if content:
+                parts.append(content)
+                timer.token()
                 yield content
+        _cache_answer(question, "".join(parts), system_prompt)
     except Exception as e:
-        print(f"ERROR: An exception occurred with the OpenAI API: {e}")
+        failed = True
+        logger.error("OpenAI API error: %s", e)
         yield "An error occurred while connecting to the service. Please try again shortly."
+    finally:
+        timer.finish(failed)  # TTFT, duration and token rate
+
+async def ask_chatgpt_stream_async(question: str, system_prompt: str = SYSTEM_PROMPT):
+    """
+    Async variant of ask_chatgpt_stream for the web server.
+    
+    The FAQ lookup and prompt building run in a worker thread and the model is
+    streamed with AsyncOpenAI, so waiting on the LLM never blocks the event loop.
+    
+    Args:
+        question: The user's question.
+        system_prompt: The system prompt to provide context to the model.
+        
+    Yields:
+        str: Chunks of the generated response.
+    """
+    from .answer_cache import replay_chunks
+    
+    source, result = await asyncio.to_thread(_prepare_answer, question, system_prompt)
+    if source == "faq":
+        yield result
+        return
+    if source == "cache":
+        for chunk in replay_chunks(result):
+            yield chunk
+        return
+    
+    timer = LLMStreamTimer()
+    failed = False
+    try:
+        stream = await get_async_client().chat.completions.create(
+            model=OPENAI_MODEL_CHAT,
+            messages=result,
+            max_tokens=MAX_TOKENS,
+            temperature=TEMPERATURE,
+            stream=True
+        )
+        
+        logger.debug("OpenAI stream initiated...")
+        parts = []
+        async for chunk in stream:
+            content = chunk.choices[0].delta.content if chunk.choices else None
+            if content:
+                parts.append(content)
+                timer.token()
+                yield content
+        _cache_answer(question, "".join(parts), system_prompt)
+    except Exception as e:
+        failed = True
+        logger.error("OpenAI API error: %s", e)
+        yield "An error occurred while connecting to the service. Please try again shortly."
+    finally:
+        timer.finish(failed)  # TTFT, duration and token rate
 
 def add_new_faq(question: str, answer: str):
     """
@@ -63,7 +206,17 @@ def add_new_faq(question: str, answer: str):
         question: The question to add.
         answer: The corresponding answer.
     """
+    from .knowledge import get_faq_system
+    faq_system = get_faq_system()
+    previous = faq_system.faqs.get(question.lower().strip())  # Keys are normalized like add_faqs does
     faq_system.add_faq(question, answer)
+    
+    if FAQ_PRERENDER_ON_ADD and answer != previous:
+        # Only the changed answer is rendered; the replaced one leaves the manifest unless still in use
+        from audio.prerender import refresh_answer_audio
+        if previous is not None and previous in faq_system.faqs.values():
+            previous = None
+        refresh_answer_audio(answer, previous)
 
 def get_faq_stats() -> dict:
     """
@@ -72,7 +225,27 @@ def get_faq_stats() -> dict:
     Returns:
         A dictionary containing statistics.
     """
+    from .answer_cache import get_answer_cache
+    from .knowledge import get_faq_system
+    faq_system = get_faq_system()
     return {
         "total_faqs": faq_system.get_faq_count(),
-        "faq_questions": faq_system.list_faqs()
-    }
\ No newline at end of file
+        "faq_questions": faq_system.list_faqs(),
+        "cache": faq_system.cache_stats(),
+        "answer_cache": get_answer_cache().stats()
+    }
+
+def batch_faq_lookup(questions: list, k: int = 1, similarity_threshold: float = 0.25) -> list:
+    """
+    Finds the top-k FAQ matches for many questions in one pass.
+    
+    Args:
+        questions: The questions to match.
+        k: Candidates to return per question.
+        similarity_threshold: Minimum similarity score (0.0-1.0).
+        
+    Returns:
+        One list of {"question", "answer", "score"} dicts per question.
+    """
+    from .knowledge import batch_rag_lookup
+    return batch_rag_lookup(questions, k=k, similarity_threshold=similarity_threshold)
\ No newline at end of file
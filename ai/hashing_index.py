@@ -0,0 +1,124 @@
+"""
+Stateless feature-hashing index.
+
+Word (1-2 gram) and character (3-5 gram) features are hashed into a fixed
+feature space, so the vectorizer has no learned vocabulary: document vectors
+never change when FAQs are added, every process hashes identically, and index
+shards built in separate processes can simply be stacked together.
+"""
+import threading
+from typing import Iterable, List, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix, hstack, load_npz, save_npz, vstack
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+N_FEATURES = 2 ** 18  # Per feature family; bounds the term-major indptr each index block keeps
+WORD_WEIGHT = 0.8  # Share of the (squared) vector norm given to word n-grams; the rest goes to char n-grams
+
+_word_vectorizer = HashingVectorizer(
+    analyzer='word', stop_words='english', lowercase=True, ngram_range=(1, 2),
+    n_features=N_FEATURES, alternate_sign=False, norm=None
+)
+_char_vectorizer = HashingVectorizer(
+    analyzer='char_wb', lowercase=True, ngram_range=(3, 5),
+    n_features=N_FEATURES, alternate_sign=False, norm=None
+)
+
+
+def hash_texts(texts: List[str]) -> csr_matrix:
+    """
+    Vectorize texts into L2-normalized hashed features.
+
+    Pure function of the input: safe to call from any process, e.g. to build shards in parallel.
+
+    Returns:
+        CSR matrix of shape (len(texts), 2 * N_FEATURES)
+    """
+    words = normalize(_word_vectorizer.transform(texts)) * np.sqrt(WORD_WEIGHT)
+    chars = normalize(_char_vectorizer.transform(texts)) * np.sqrt(1.0 - WORD_WEIGHT)
+    return normalize(hstack([words, chars], format='csr'))
+
+
+class HashingIndex:
+    def __init__(self):
+        # [(rows, rows transposed to term-major CSR)] in insertion order. Blocks are merged
+        # like a binary counter, so appends stay amortized O(new docs) and queries touch
+        # O(log n) blocks.
+        self._blocks = []
+        self._num_docs = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._num_docs
+
+    def add(self, texts: Iterable[str]) -> None:
+        """Hash new documents and append them; existing rows are never recomputed"""
+        texts = list(texts)
+        if texts:
+            self.add_shard(hash_texts(texts))
+
+    def add_shard(self, shard: csr_matrix) -> None:
+        """Append rows hashed elsewhere (another process, or a saved shard)"""
+        shard = csr_matrix(shard)
+        if not shard.shape[0]:
+            return
+        with self._lock:
+            blocks = self._blocks + [(shard, shard.T.tocsr())]
+            while len(blocks) > 1 and blocks[-1][0].shape[0] * 2 >= blocks[-2][0].shape[0]:
+                merged = vstack([blocks[-2][0], blocks[-1][0]], format='csr')
+                blocks[-2:] = [(merged, merged.T.tocsr())]
+            self._blocks = blocks
+            self._num_docs += shard.shape[0]
+
+    @property
+    def matrix(self) -> csr_matrix:
+        """All document rows as one CSR matrix"""
+        blocks = self._blocks
+        if not blocks:
+            return None
+        if len(blocks) == 1:
+            return blocks[0][0]
+        return vstack([rows for rows, _ in blocks], format='csr')
+
+    def score(self, texts: List[str]) -> np.ndarray:
+        """Cosine similarity of each text against every document (dense, one row per text)"""
+        blocks = self._blocks
+        if not blocks:
+            return np.zeros((len(texts), 0))
+        queries = hash_texts(texts)
+        return np.hstack([(queries @ columns).toarray() for _, columns in blocks])
+
+    def top_k(self, text: str, k: int = 1) -> List[Tuple[int, float]]:
+        """
+        Return the best k documents for a query.
+
+        Returns:
+            (doc id, cosine similarity) pairs, best first
+        """
+        scores = self.score([text])[0]
+        if not len(scores) or k <= 0:
+            return []
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(idx), float(scores[idx])) for idx in top if scores[idx] > 0]
+
+    def save(self, path: str) -> None:
+        """Write the index as a shard (.npz)"""
+        matrix = self.matrix
+        save_npz(path, matrix if matrix is not None else csr_matrix((0, 2 * N_FEATURES)))
+
+    @staticmethod
+    def load_shard(path: str) -> csr_matrix:
+        """Read a shard written by ``save``"""
+        return load_npz(path).tocsr()
+
+    @classmethod
+    def merge(cls, shards: Iterable[csr_matrix]) -> "HashingIndex":
+        """Build one index from shards, in order (doc ids follow shard order)"""
+        index = cls()
+        for shard in shards:
+            index.add_shard(shard)
+        return index
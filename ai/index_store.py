@@ -0,0 +1,190 @@
+"""
+Persisted TF-IDF index artifacts.
+
+An artifact is a directory holding one ``.npy`` file per array (vocabulary
+terms, IDF weights, the CSR matrix and its term-major CSC copy, optionally
+the FAQ text) plus a ``manifest.json`` keyed by the SHA-256 of the source
+file it was built from. Arrays are opened with ``mmap_mode='r'`` so loading
+an index costs a few file opens instead of a vectorizer fit, and every
+process that maps the same artifact shares one copy in the page cache.
+"""
+import json
+import os
+import shutil
+import tempfile
+from collections.abc import Mapping
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+from scipy.sparse import csc_matrix, csr_matrix
+
+MANIFEST_NAME = "manifest.json"
+FORMAT_VERSION = 2
+ARRAY_NAMES = ("terms", "idf", "data", "indices", "indptr", "csc_data", "csc_indices", "csc_indptr")
+DOCUMENT_ARRAY_NAMES = ("questions", "question_offsets", "answers", "answer_offsets")
+
+
+class IndexArtifact(NamedTuple):
+    vocabulary: Dict[str, int]
+    idf: np.ndarray
+    matrix: csr_matrix  # Document rows
+    postings: csc_matrix  # Same matrix, term-major
+    questions: Optional[List[str]]  # Row order; None if the artifact has no documents
+    answers: Optional["MappedAnswers"]
+
+
+class MappedAnswers(Mapping):
+    """Read-only {question: answer} mapping that decodes answers from a memory-mapped blob on access"""
+
+    def __init__(self, questions: List[str], blob: np.ndarray, offsets: np.ndarray):
+        self._questions = questions
+        self._rows = {question: row for row, question in enumerate(questions)}
+        self._blob = blob
+        self._offsets = offsets
+
+    def __getitem__(self, question: str) -> str:
+        row = self._rows[question]
+        return bytes(self._blob[self._offsets[row]:self._offsets[row + 1]]).decode('utf-8')
+
+    def __contains__(self, question) -> bool:
+        return question in self._rows
+
+    def __iter__(self):
+        return iter(self._questions)
+
+    def __len__(self) -> int:
+        return len(self._questions)
+
+
+def _pack_strings(strings: List[str]):
+    """Encode strings as one UTF-8 byte blob plus offsets"""
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_strings(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    raw = bytes(blob)
+    return [raw[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+
+def vectorizer_params(vectorizer) -> dict:
+    """Return the vectorizer settings that must match for an artifact to be reused"""
+    params = vectorizer.get_params()
+    return {
+        "stop_words": params["stop_words"],
+        "lowercase": params["lowercase"],
+        "max_features": params["max_features"],
+        "ngram_range": list(params["ngram_range"]),
+    }
+
+
+def save_tfidf_index(index_dir: str, vectorizer, matrix, source_hash: str,
+                     documents: Optional[Mapping] = None) -> None:
+    """
+    Write a fitted vectorizer and its document matrix to ``index_dir``.
+
+    The artifact is written to a sibling temp directory first and swapped in,
+    so readers never see a half-written index.
+
+    Args:
+        index_dir: Target directory for the artifact
+        vectorizer: Fitted TfidfVectorizer
+        matrix: CSR document matrix produced by the vectorizer
+        source_hash: SHA-256 of the source file the index was built from
+        documents: Optional {question: answer} in row order, stored so other
+            processes can attach without parsing the source file
+    """
+    vocabulary = vectorizer.vocabulary_
+    terms = [None] * len(vocabulary)
+    for term, column in vocabulary.items():
+        terms[column] = term
+
+    matrix = csr_matrix(matrix)
+    postings = matrix.tocsc()
+    arrays = {
+        "terms": np.array(terms, dtype=str),
+        "idf": np.asarray(vectorizer.idf_, dtype=np.float64),
+        "data": matrix.data,
+        "indices": matrix.indices,
+        "indptr": matrix.indptr,
+        "csc_data": postings.data,
+        "csc_indices": postings.indices,
+        "csc_indptr": postings.indptr,
+    }
+    if documents is not None:
+        questions = list(documents.keys())
+        arrays["questions"], arrays["question_offsets"] = _pack_strings(questions)
+        arrays["answers"], arrays["answer_offsets"] = _pack_strings([documents[q] for q in questions])
+    manifest = {
+        "version": FORMAT_VERSION,
+        "source_hash": source_hash,
+        "params": vectorizer_params(vectorizer),
+        "shape": list(matrix.shape),
+        "has_documents": documents is not None,
+    }
+
+    parent = os.path.dirname(os.path.abspath(index_dir))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".index-", dir=parent)
+    try:
+        os.chmod(tmp_dir, 0o755)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), array, allow_pickle=False)
+        with open(os.path.join(tmp_dir, MANIFEST_NAME), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        old_dir = None
+        if os.path.exists(index_dir):
+            old_dir = tempfile.mkdtemp(prefix=".index-old-", dir=parent)
+            os.rmdir(old_dir)
+            os.replace(index_dir, old_dir)
+        os.replace(tmp_dir, index_dir)
+        if old_dir:
+            shutil.rmtree(old_dir, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def load_tfidf_index(index_dir: str, source_hash: Optional[str], params: dict) -> Optional[IndexArtifact]:
+    """
+    Memory-map a persisted index if it was built from ``source_hash``.
+
+    Args:
+        index_dir: Directory holding the artifact
+        source_hash: SHA-256 of the current source file, or None to accept
+            whatever the artifact was built from (attaching to an index
+            prepared by another process)
+        params: Expected vectorizer settings (see ``vectorizer_params``)
+
+    Returns:
+        IndexArtifact if the artifact is present and current, None otherwise
+    """
+    manifest_path = os.path.join(index_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return None
+
+    with open(manifest_path, 'r') as f:
+        manifest = json.load(f)
+    if (manifest.get("version") != FORMAT_VERSION
+            or (source_hash is not None and manifest.get("source_hash") != source_hash)
+            or manifest.get("params") != params):
+        return None
+
+    names = ARRAY_NAMES + (DOCUMENT_ARRAY_NAMES if manifest.get("has_documents") else ())
+    arrays = {
+        name: np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode='r', allow_pickle=False)
+        for name in names
+    }
+    shape = tuple(manifest["shape"])
+    vocabulary = {str(term): column for column, term in enumerate(arrays["terms"])}
+    matrix = csr_matrix((arrays["data"], arrays["indices"], arrays["indptr"]), shape=shape, copy=False)
+    postings = csc_matrix((arrays["csc_data"], arrays["csc_indices"], arrays["csc_indptr"]), shape=shape, copy=False)
+
+    questions = answers = None
+    if manifest.get("has_documents"):
+        questions = _unpack_strings(arrays["questions"], arrays["question_offsets"])
+        answers = MappedAnswers(questions, arrays["answers"], arrays["answer_offsets"])
+    return IndexArtifact(vocabulary, arrays["idf"], matrix, postings, questions, answers)
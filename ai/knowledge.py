@@ -1,25 +1,181 @@
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from scipy.sparse import vstack
+import hashlib
 import json
 import os
-from typing import Optional, Dict, List
+import threading
+import time
+from typing import Optional, Dict, List, Tuple
+from config import (
+    FAQ_INDEX_DIR, FAQ_JOURNAL_COMPACT_MIN, FAQ_JOURNAL_COMPACT_RATIO, FAQ_COMPACT_MIN_INTERVAL,
+    FAQ_CACHE_SIZE, FAQ_CACHE_TTL, FAQ_ENGINE, FAQ_SHARED_INDEX
+)
+from .bm25 import BM25Index
+from .cache import QueryCache
+from .hashing_index import HashingIndex
+from .index_store import save_tfidf_index, load_tfidf_index, vectorizer_params
+from utils.lazy import Lazy
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+class TfidfScorer:
+    """
+    Lean per-query scorer over an L2-normalized TF-IDF matrix.
+    
+    Skips the sklearn transform/cosine_similarity path: the query is tokenized
+    with the vectorizer's analyzer, looked up in a plain vocabulary dict, and
+    scored by accumulating the matching term columns (a single sparse dot
+    product). Document rows are already unit length, so the scores are cosine
+    similarities.
+    """
+    
+    def __init__(self, vectorizer: TfidfVectorizer, matrix, postings=None):
+        """
+        Args:
+            vectorizer: Fitted (or vocabulary-bound) TfidfVectorizer
+            matrix: CSR document matrix
+            postings: The same matrix in CSC form, e.g. memory-mapped from an
+                index artifact; computed from ``matrix`` when omitted
+        """
+        self.matrix = matrix
+        self.num_docs = matrix.shape[0]
+        self._analyze = vectorizer.build_analyzer()
+        self._vocabulary = dict(vectorizer.vocabulary_)
+        self._idf = np.asarray(vectorizer.idf_, dtype=np.float64)
+        if postings is None:
+            postings = matrix.tocsc()  # Term-major: one contiguous slice of documents per term
+        self.postings = postings
+        self._indptr = postings.indptr
+        self._indices = postings.indices
+        self._data = postings.data
+    
+    def vectorize(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (term columns, L2-normalized TF-IDF weights) for a query"""
+        counts = {}
+        vocabulary = self._vocabulary
+        for term in self._analyze(text):
+            column = vocabulary.get(term)
+            if column is not None:
+                counts[column] = counts.get(column, 0) + 1
+        
+        columns = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        weights = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+        weights *= self._idf[columns]
+        norm = np.sqrt(weights @ weights)
+        if norm:
+            weights /= norm
+        return columns, weights
+    
+    def top_k(self, text: str, k: int = 1) -> List[Tuple[int, float]]:
+        """
+        Score a query against every document and return the best k.
+        
+        Returns:
+            (row index, cosine similarity) pairs, best first; empty if no query term is known
+        """
+        columns, weights = self.vectorize(text)
+        if not len(columns) or k <= 0:
+            return []
+        
+        scores = np.zeros(self.num_docs)
+        indptr, indices, data = self._indptr, self._indices, self._data
+        for column, weight in zip(columns.tolist(), weights.tolist()):
+            start, end = indptr[column], indptr[column + 1]
+            scores[indices[start:end]] += weight * data[start:end]
+        
+        if k == 1:
+            best = int(scores.argmax())
+            return [(best, float(scores[best]))]
+        k = min(k, self.num_docs)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(idx), float(scores[idx])) for idx in top]
+
+def _journal_lines(entries: List[Tuple[str, str]]) -> str:
+    """Journal records (one JSON object per line) for (question, answer) entries"""
+    return "".join(json.dumps({"question": q, "answer": a}) + "\n" for q, a in entries)
 
 class EnhancedRAG:
-    def __init__(self, faq_file: str = "faq_database.json"):
+    ENGINES = ("tfidf", "bm25", "hashing")
+    
+    def __init__(self, faq_file: str = "faq_database.json", index_dir: Optional[str] = FAQ_INDEX_DIR,
+                 journal_file: Optional[str] = None, engine: str = FAQ_ENGINE,
+                 shared: bool = FAQ_SHARED_INDEX):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown retrieval engine '{engine}', expected one of {self.ENGINES}")
+        # "tfidf": capped-vocabulary cosine; "bm25": inverted index for large corpora;
+        # "hashing": stateless hashed word/char n-grams (no refits, mergeable shards)
+        self.engine = engine
         self.faq_file = faq_file
+        self.index_dir = index_dir  # Persisted index artifact (None disables it)
+        self.journal_file = journal_file or os.path.splitext(faq_file)[0] + ".journal.jsonl"
         self.faqs = {}  # {question: answer}
         self.questions_list = []
-        self.vectorizer = TfidfVectorizer(
+        self.vectorizer = self._new_vectorizer()
+        self.tfidf_matrix = None
+        self._fitted_rows = 0  # Questions the vectorizer was fitted on (later rows are transformed only)
+        self._scorer = None  # TfidfScorer over tfidf_matrix, rebuilt lazily when the matrix changes
+        self._bm25 = None  # BM25Index when engine == "bm25"
+        self._hashing = None  # HashingIndex when engine == "hashing"
+        self._source_hash = None  # SHA-256 of the FAQ file the index reflects
+        self._similarity_cache = QueryCache(FAQ_CACHE_SIZE, FAQ_CACHE_TTL)  # Cache for repeated queries
+        self._generation = 0  # Bumped whenever the index changes; stale cache entries are dropped
+        self._pending_questions = []  # Added questions not yet vectorized
+        self._journal = []  # (question, answer) entries not yet compacted into the snapshot
+        self._lock = threading.RLock()
+        self._compaction_lock = threading.Lock()
+        self._compaction_thread = None
+        self._last_compaction = None  # time.monotonic() when the last compaction started
+        self._cap_warned = False
+        self.read_only = False  # True when attached to a shared index prepared by another process
+        if shared and self._attach_shared_index():
+            return
+        self._load_initial_faqs()
+        
+    @staticmethod
+    def _new_vectorizer(vocabulary: Optional[Dict[str, int]] = None) -> TfidfVectorizer:
+        """Create a TF-IDF vectorizer, optionally bound to a precomputed vocabulary"""
+        return TfidfVectorizer(
             stop_words='english', 
             lowercase=True,
             max_features=1000,  # Limit features for speed
-            ngram_range=(1, 2)  # Include bigrams for better matching
+            ngram_range=(1, 2),  # Include bigrams for better matching
+            vocabulary=vocabulary
         )
-        self.tfidf_matrix = None
-        self._similarity_cache = {}  # Cache for repeated queries
-        self._load_initial_faqs()
         
+    def _attach_shared_index(self) -> bool:
+        """
+        Map a prebuilt index (see ``prepare_shared_index``) read-only, FAQ text included.
+        
+        Nothing is parsed or fitted, and the arrays stay in the page cache shared
+        by every process that maps them, so each web worker adds only the small
+        Python-side lookup tables.
+        """
+        if self.engine != "tfidf" or not self.index_dir:
+            logger.warning("Shared FAQ index needs the tfidf engine and an index_dir; building a private index")
+            return False
+        try:
+            artifact = load_tfidf_index(self.index_dir, None, vectorizer_params(self.vectorizer))
+        except Exception as e:
+            logger.warning("Ignoring unreadable shared FAQ index at %s: %s", self.index_dir, e)
+            return False
+        if artifact is None or artifact.questions is None:
+            logger.warning("No shared FAQ index at %s; building a private index", self.index_dir)
+            return False
+        
+        self.faqs = artifact.answers
+        self.questions_list = artifact.questions
+        self.vectorizer = self._new_vectorizer(artifact.vocabulary)
+        self.vectorizer.idf_ = artifact.idf
+        self.tfidf_matrix = artifact.matrix
+        self._fitted_rows = artifact.matrix.shape[0]
+        self._scorer = TfidfScorer(self.vectorizer, artifact.matrix, artifact.postings)
+        self.read_only = True
+        logger.info("Attached to shared FAQ index at %s (%s FAQs)", self.index_dir, len(self.questions_list))
+        return True
+    
     def _load_initial_faqs(self):
         """Load initial FAQs - either from JSON or use hardcoded defaults"""
         if os.path.exists(self.faq_file):
@@ -27,6 +183,8 @@ class EnhancedRAG:
         else:
             self._load_hardcoded_faqs()
             self._save_to_json()
+            self._save_index()
+            self._replay_journal()
     
     def _load_hardcoded_faqs(self):
         """Your original hardcoded FAQs"""
@@ -123,50 +281,323 @@ class EnhancedRAG:
         self._update_vectorizer()
     
     def _load_from_json(self):
-        """Load FAQs from JSON file"""
+        """Load FAQs from the JSON snapshot, then replay the append-only journal"""
         try:
-            with open(self.faq_file, 'r') as f:
-                data = json.load(f)
-                self.faqs = data.get("faqs", {})
-                self.questions_list = list(self.faqs.keys())
+            with open(self.faq_file, 'rb') as f:
+                raw = f.read()
+            data = json.loads(raw)
+            self.faqs = data.get("faqs", {})
+            self.questions_list = list(self.faqs.keys())
+            self._source_hash = hashlib.sha256(raw).hexdigest()
+            if not self._load_index():
                 self._update_vectorizer()
-                print(f"✅ Loaded {len(self.faqs)} FAQs from {self.faq_file}")
+                self._save_index()
+            logger.info("Loaded %s FAQs from %s", len(self.faqs), self.faq_file)
         except Exception as e:
-            print(f"❌ Error loading FAQ JSON: {e}. Using hardcoded FAQs.")
+            logger.error("Error loading FAQ JSON: %s. Using hardcoded FAQs.", e)
             self._load_hardcoded_faqs()
+        self._replay_journal()
+    
+    def _replay_journal(self):
+        """Apply FAQs that were added after the last snapshot was written"""
+        if not os.path.exists(self.journal_file):
+            return
+        entries = []
+        try:
+            with open(self.journal_file, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Torn write from a crash mid-append
+                    entries.append((record["question"], record["answer"]))
+        except Exception as e:
+            logger.error("Error reading FAQ journal: %s", e)
+            return
+        
+        if entries:
+            self._apply_faqs(entries)
+            self._journal.extend(entries)
+            logger.info("Replayed %s FAQs from %s", len(entries), self.journal_file)
+            self._maybe_compact()
     
     def _save_to_json(self):
         """Save FAQs to JSON file"""
         try:
-            data = {"faqs": self.faqs}
-            with open(self.faq_file, 'w') as f:
-                json.dump(data, f, indent=2)
-            print(f"✅ Saved {len(self.faqs)} FAQs to {self.faq_file}")
+            raw = json.dumps({"faqs": self.faqs}, indent=2).encode()
+            self._source_hash = self._write_snapshot(raw)
+            logger.info("Saved %s FAQs to %s", len(self.faqs), self.faq_file)
+        except Exception as e:
+            logger.error("Error saving FAQ JSON: %s", e)
+    
+    def _write_snapshot(self, raw: bytes) -> str:
+        """Atomically replace the FAQ snapshot; returns its hash"""
+        tmp_path = f"{self.faq_file}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(raw)
+        os.replace(tmp_path, self.faq_file)
+        return hashlib.sha256(raw).hexdigest()
+    
+    def _load_index(self) -> bool:
+        """Memory-map the persisted index if it matches the current FAQ file"""
+        if self.engine != "tfidf" or not self.index_dir or not self._source_hash:
+            return False
+        try:
+            loaded = load_tfidf_index(self.index_dir, self._source_hash, vectorizer_params(self.vectorizer))
+        except Exception as e:
+            logger.warning("Ignoring unreadable FAQ index at %s: %s", self.index_dir, e)
+            return False
+        if loaded is None:
+            return False
+        
+        if loaded.matrix.shape[0] != len(self.questions_list):
+            return False
+        vectorizer = self._new_vectorizer(loaded.vocabulary)
+        vectorizer.idf_ = loaded.idf
+        self.vectorizer = vectorizer
+        self.tfidf_matrix = loaded.matrix
+        self._fitted_rows = loaded.matrix.shape[0]
+        self._scorer = TfidfScorer(vectorizer, loaded.matrix, loaded.postings)
+        logger.info("Loaded FAQ index from %s", self.index_dir)
+        return True
+    
+    def _save_index(self):
+        """Persist the fitted index so the next start can skip refitting"""
+        if not self.index_dir or not self._source_hash or self.tfidf_matrix is None:
+            return
+        try:
+            save_tfidf_index(self.index_dir, self.vectorizer, self.tfidf_matrix, self._source_hash, self.faqs)
         except Exception as e:
-            print(f"❌ Error saving FAQ JSON: {e}")
+            logger.error("Error saving FAQ index: %s", e)
+    
+    def build_index(self) -> str:
+        """
+        Refit the vectorizer from the FAQ file and write the index artifact.
+        
+        Journaled FAQs are compacted into the snapshot first.
+        
+        Returns:
+            Directory the artifact was written to
+        """
+        if not self.index_dir:
+            raise ValueError("index_dir is not configured")
+        if self.engine != "tfidf":
+            raise ValueError(f"The {self.engine} engine has no persisted index")
+        if self.read_only:
+            raise RuntimeError("Attached to a shared FAQ index; rebuild it from a writable instance")
+        if self._journal:
+            self.compact()
+            return self.index_dir
+        with self._lock:
+            with open(self.faq_file, 'rb') as f:
+                self._source_hash = hashlib.sha256(f.read()).hexdigest()
+            self._update_vectorizer()
+            save_tfidf_index(self.index_dir, self.vectorizer, self.tfidf_matrix, self._source_hash, self.faqs)
+        return self.index_dir
     
     def _update_vectorizer(self):
-        """Update TF-IDF vectorizer with current questions"""
-        if self.questions_list:
+        """Update TF-IDF vectorizer (or rebuild the BM25 index) with current questions"""
+        if self.engine == "bm25":
+            self._bm25 = BM25Index()
+            self._bm25.add(self.questions_list)
+        elif self.engine == "hashing":
+            self._hashing = HashingIndex()
+            self._hashing.add(self.questions_list)
+        elif self.questions_list:
+            self.vectorizer = self._new_vectorizer()
             self.tfidf_matrix = self.vectorizer.fit_transform(self.questions_list)
+            self._fitted_rows = len(self.questions_list)
+        self._pending_questions = []
+        self._generation += 1
+    
+    def _apply_faqs(self, entries: List[Tuple[str, str]]):
+        """Insert FAQs in memory; new questions are vectorized lazily against the current vocabulary"""
+        with self._lock:
+            for question, answer in entries:
+                if question not in self.faqs:
+                    self.questions_list.append(question)
+                    self._pending_questions.append(question)
+                self.faqs[question] = answer
+            self._generation += 1
+    
+    def _ensure_indexed(self):
+        """Vectorize pending questions and append their rows to the matrix in one step"""
+        if not self._pending_questions:
+            return
+        with self._lock:
+            if not self._pending_questions:
+                return
+            if self.engine == "bm25":
+                self._bm25.add(self._pending_questions)  # Postings are append-only: no rebuild
+                self._pending_questions = []
+                return
+            if self.engine == "hashing":
+                self._hashing.add(self._pending_questions)  # Only the new rows are hashed
+                self._pending_questions = []
+                return
+            if self.tfidf_matrix is None:
+                self._update_vectorizer()
+                return
+            if self._has_unknown_terms(self._pending_questions):
+                # Their new words would be dropped by the current vocabulary: refit now so the
+                # FAQs are findable immediately, and persist the refit in the background
+                self._update_vectorizer()
+                self._maybe_compact(force=True)
+                return
+            rows = self.vectorizer.transform(self._pending_questions)
+            self.tfidf_matrix = vstack([self.tfidf_matrix, rows], format='csr')
+            self._pending_questions = []
+    
+    def _has_unknown_terms(self, questions: List[str]) -> bool:
+        """True if any question has a word (unigram) that a refit would add to the vocabulary"""
+        vocabulary = self.vectorizer.vocabulary_
+        max_features = self.vectorizer.max_features
+        if max_features is not None and len(vocabulary) >= max_features:
+            # At the cap a refit keeps only the most frequent terms, so the words of a few
+            # new questions would be cut again. Below it every refit adds a term, which
+            # bounds the refits to the free vocabulary slots
+            if not self._cap_warned:
+                self._cap_warned = True
+                logger.warning("FAQ vocabulary is full (%s terms): new words are not indexed until "
+                               "they are frequent; FAQ_ENGINE=bm25 or hashing has no cap", max_features)
+            return False
+        analyze = self.vectorizer.build_analyzer()
+        return any(' ' not in term and term not in vocabulary
+                   for question in questions for term in analyze(question))
+    
+    def _get_scorer(self) -> Optional[TfidfScorer]:
+        """Return a scorer for the current matrix, rebuilding it if the index changed"""
+        self._ensure_indexed()
+        with self._lock:
+            if self.tfidf_matrix is None:
+                return None
+            if self._scorer is None or self._scorer.matrix is not self.tfidf_matrix:
+                self._scorer = TfidfScorer(self.vectorizer, self.tfidf_matrix)
+            return self._scorer
+    
+    def _search(self, question_clean: str, k: int = 1) -> List[Tuple[int, float]]:
+        """Top-k (row index, score) candidates from the configured engine"""
+        if self.engine == "bm25":
+            self._ensure_indexed()
+            return self._bm25.top_k(question_clean, k)
+        if self.engine == "hashing":
+            self._ensure_indexed()
+            return self._hashing.top_k(question_clean, k)
+        scorer = self._get_scorer()
+        return scorer.top_k(question_clean, k) if scorer else []
     
     def add_faq(self, question: str, answer: str):
         """Add a new FAQ question-answer pair"""
-        normalized_question = question.lower().strip()
-        self.faqs[normalized_question] = answer
+        self.add_faqs([(question, answer)])
+        logger.info("Added new FAQ: '%s'", question)
+    
+    def add_faqs(self, pairs: List[Tuple[str, str]]):
+        """
+        Add many FAQ question-answer pairs with a single journal append.
         
-        # Update data structures
-        if normalized_question not in self.questions_list:
-            self.questions_list.append(normalized_question)
-            self._update_vectorizer()
+        New questions are matchable immediately: against the existing vocabulary,
+        or after an in-memory refit if they bring words it does not know. The
+        snapshot and index are rewritten by background compaction.
+        
+        Args:
+            pairs: (question, answer) tuples
+        """
+        if self.read_only:
+            raise RuntimeError("Attached to a shared FAQ index; add FAQs from a single-worker process "
+                               "and restart the workers")
+        entries = [(question.lower().strip(), answer) for question, answer in pairs]
+        if not entries:
+            return
+        
+        with self._lock:
+            with open(self.journal_file, 'a') as f:
+                f.write(_journal_lines(entries))
+            self._journal.extend(entries)
+            self._apply_faqs(entries)
+        self._maybe_compact()
+    
+    def _maybe_compact(self, force: bool = False):
+        """
+        Start background compaction once the journal outgrows the snapshot.
+        
+        Args:
+            force: Compact any journaled FAQs now (the vocabulary was refitted for them),
+                at most once per FAQ_COMPACT_MIN_INTERVAL; the journal replays the refit otherwise
+        """
+        threshold = max(FAQ_JOURNAL_COMPACT_MIN, int(len(self.faqs) * FAQ_JOURNAL_COMPACT_RATIO))
+        if not self._journal:
+            return
+        if len(self._journal) < threshold:
+            recent = (self._last_compaction is not None
+                      and time.monotonic() - self._last_compaction < FAQ_COMPACT_MIN_INTERVAL)
+            if not force or recent:
+                return
+        with self._lock:
+            if self._compaction_thread and self._compaction_thread.is_alive():
+                return
+            self._last_compaction = time.monotonic()
+            self._compaction_thread = threading.Thread(target=self.compact, daemon=True)
+            self._compaction_thread.start()
+    
+    def compact(self):
+        """
+        Refit the vectorizer, rewrite the JSON snapshot and index, and truncate the journal.
         
-        # Auto-save to JSON
-        self._save_to_json()
-        print(f"✅ Added new FAQ: '{question}'")
+        A vectorizer already fitted on every question is reused rather than refitted.
+        Files are written outside the index lock, so lookups keep running; FAQs added
+        meanwhile stay in the journal and are re-vectorized against the new vocabulary
+        when the result is swapped in.
+        """
+        with self._compaction_lock:
+            with self._lock:
+                questions = list(self.questions_list)
+                snapshot = {q: self.faqs[q] for q in questions}
+                compacted_entries = len(self._journal)
+                remaining = self._journal[compacted_entries:]
+                vectorizer = matrix = None
+                if self.engine == "tfidf" and self._fitted_rows == len(questions):
+                    vectorizer, matrix = self.vectorizer, self.tfidf_matrix
+            if not compacted_entries:
+                return
+            
+            try:
+                refitted = self.engine == "tfidf" and matrix is None
+                if refitted:
+                    vectorizer = self._new_vectorizer()
+                    matrix = vectorizer.fit_transform(questions)
+                source_hash = self._write_snapshot(json.dumps({"faqs": snapshot}, indent=2).encode())
+                
+                tmp_path = f"{self.journal_file}.tmp"
+                with open(tmp_path, 'w') as f:
+                    f.write(_journal_lines(remaining))
+                with self._lock:
+                    late = self._journal[compacted_entries + len(remaining):]
+                    if late:  # Appended while the file was written
+                        with open(tmp_path, 'a') as f:
+                            f.write(_journal_lines(late))
+                    os.replace(tmp_path, self.journal_file)
+                    self._journal = self._journal[compacted_entries:]
+                    self._source_hash = source_hash
+                    
+                    if refitted and self._fitted_rows < len(questions):
+                        self.vectorizer = vectorizer
+                        self.tfidf_matrix = matrix
+                        self._fitted_rows = len(questions)
+                        self._pending_questions = self.questions_list[len(questions):]
+                        self._generation += 1
+                
+                if self.index_dir and matrix is not None:
+                    save_tfidf_index(self.index_dir, vectorizer, matrix, source_hash, snapshot)
+                logger.info("Compacted %s journaled FAQs into %s", compacted_entries, self.faq_file)
+            except Exception as e:
+                logger.error("Error compacting FAQ journal: %s", e)
     
     def find_best_match(self, user_question: str, similarity_threshold: float = 0.25) -> Optional[str]:
         """
-        Find the best matching FAQ using TF-IDF cosine similarity.
+        Find the best matching FAQ using TF-IDF cosine similarity (or BM25).
         
         Args:
             user_question: The user's input question
@@ -185,32 +616,116 @@ class EnhancedRAG:
             return self.faqs[user_question_clean]
         
         # Check cache for repeated queries
-        if user_question_clean in self._similarity_cache:
-            cached_result = self._similarity_cache[user_question_clean]
+        cache_key = (user_question_clean, similarity_threshold)
+        generation = self._generation
+        found, cached_result = self._similarity_cache.get(cache_key, generation)
+        if found:
             if cached_result:
                 return self.faqs[cached_result]
             return None
         
-        # TF-IDF similarity matching
+        # Similarity matching (TF-IDF cosine or normalized BM25)
         try:
-            user_vector = self.vectorizer.transform([user_question_clean])
-            similarities = cosine_similarity(user_vector, self.tfidf_matrix).flatten()
-            
-            best_match_idx = np.argmax(similarities)
-            best_similarity = similarities[best_match_idx]
+            top = self._search(user_question_clean, 1)
             
-            if best_similarity > similarity_threshold:
+            if top and top[0][1] > similarity_threshold:
+                best_match_idx = top[0][0]
                 best_question = self.questions_list[best_match_idx]
-                self._similarity_cache[user_question_clean] = best_question  # Cache result
+                self._similarity_cache.put(cache_key, best_question, generation)  # Cache result
                 return self.faqs[best_question]
             else:
-                self._similarity_cache[user_question_clean] = None  # Cache negative result
+                self._similarity_cache.put(cache_key, None, generation)  # Cache negative result
                 return None
                 
         except Exception as e:
-            print(f"❌ Error in similarity matching: {e}")
+            logger.error("Error in similarity matching: %s", e)
             return None
     
+    def find_best_matches(self, questions: List[str], k: int = 1,
+                          similarity_threshold: float = 0.25, batch_size: int = 1024) -> List[List[dict]]:
+        """
+        Find the top-k matching FAQs for many questions at once.
+        
+        The whole batch is vectorized in one call and scored with a single sparse
+        matrix product per chunk (rows are already L2-normalized, so the product
+        is the cosine similarity). Top-1 results are written to the query cache,
+        which makes this usable for pre-warming.
+        
+        Args:
+            questions: User questions
+            k: Number of candidates to return per question
+            similarity_threshold: Minimum similarity score (0.0-1.0)
+            batch_size: Questions scored per matrix product (bounds memory)
+            
+        Returns:
+            One list per question of {"question", "answer", "score"} dicts, best first
+        """
+        results = [[] for _ in questions]
+        if not self.questions_list or not questions or k <= 0:
+            return results
+        
+        self._ensure_indexed()
+        with self._lock:
+            generation = self._generation
+        cleaned = [q.lower().strip() for q in questions]
+        
+        try:
+            for offset, ranked in self._rank_batch(cleaned, k, batch_size):
+                for row, candidates in enumerate(ranked):
+                    question = cleaned[offset + row]
+                    matches = [
+                        {
+                            "question": self.questions_list[idx],
+                            "answer": self.faqs[self.questions_list[idx]],
+                            "score": score
+                        }
+                        for idx, score in candidates if score > similarity_threshold
+                    ]
+                    if question in self.faqs and (not matches or matches[0]["question"] != question):
+                        # Exact matches win, as in find_best_match
+                        matches = [m for m in matches if m["question"] != question]
+                        matches.insert(0, {"question": question, "answer": self.faqs[question], "score": 1.0})
+                        matches = matches[:k]
+                    results[offset + row] = matches
+                    
+                    if question:
+                        best = matches[0]["question"] if matches else None
+                        self._similarity_cache.put((question, similarity_threshold), best, generation)
+        except Exception as e:
+            logger.error("Error in batch similarity matching: %s", e)
+        
+        return results
+    
+    def _rank_batch(self, cleaned: List[str], k: int, batch_size: int):
+        """Yield (offset, per-question [(row index, score)] lists) for each chunk of questions"""
+        if self.engine == "bm25":
+            for start in range(0, len(cleaned), batch_size):
+                chunk = cleaned[start:start + batch_size]
+                yield start, [self._bm25.top_k(q, k) if q else [] for q in chunk]
+            return
+        
+        if self.engine == "hashing":
+            k = min(k, len(self._hashing))
+            score_chunk = self._hashing.score
+        else:
+            scorer = self._get_scorer()
+            with self._lock:
+                vectorizer = self.vectorizer
+            corpus_t = scorer.postings.T  # CSC transposes to CSR without copying
+            k = min(k, scorer.num_docs)
+            score_chunk = lambda chunk: (vectorizer.transform(chunk) @ corpus_t).toarray()
+        for start in range(0, len(cleaned), batch_size):
+            chunk = cleaned[start:start + batch_size]
+            scores = score_chunk(chunk)
+            if k < scores.shape[1]:
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            else:
+                top = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+            yield start, [
+                [(int(idx), float(scores[row, idx])) for idx in sorted(top[row], key=lambda idx: -scores[row, idx])]
+                for row in range(len(chunk))
+            ]
+    
     def get_faq_count(self) -> int:
         """Get total number of FAQs"""
         return len(self.faqs)
@@ -218,9 +733,50 @@ class EnhancedRAG:
     def list_faqs(self) -> List[str]:
         """List all FAQ questions"""
         return list(self.faqs.keys())
+    
+    def cache_stats(self) -> dict:
+        """Get query cache size and hit/miss/eviction counters"""
+        return self._similarity_cache.stats()
+
+# Global instance, built on first use so importing this module stays cheap
+_faq_system = Lazy(EnhancedRAG, "faq_system")
+
+def get_faq_system() -> EnhancedRAG:
+    """Return the shared EnhancedRAG, loading the FAQ index on first call"""
+    return _faq_system.get()
 
-# Global instance
-faq_system = EnhancedRAG()
+def faq_system_ready() -> bool:
+    """True once the shared EnhancedRAG has been built"""
+    return _faq_system.ready
+
+def prepare_shared_index(faq_file: str = "faq_database.json", index_dir: Optional[str] = FAQ_INDEX_DIR) -> bool:
+    """
+    Bring the FAQ index artifact up to date so web workers can attach to it.
+    
+    Run once in the parent process before forking workers: journaled FAQs are
+    compacted and the artifact (including FAQ text) is rewritten if stale.
+    
+    Returns:
+        True if workers can attach with FAQ_SHARED_INDEX, False if each
+        worker has to build its own index (non-tfidf engine, no index_dir)
+    """
+    rag = EnhancedRAG(faq_file=faq_file, index_dir=index_dir, shared=False)
+    if rag.engine != "tfidf" or not rag.index_dir:
+        return False
+    if rag._journal:
+        rag.compact()
+    try:
+        artifact = load_tfidf_index(rag.index_dir, rag._source_hash, vectorizer_params(rag.vectorizer))
+    except Exception as e:
+        logger.error("Shared FAQ index is unreadable: %s", e)
+        return False
+    return artifact is not None and artifact.questions is not None
+
+def __getattr__(name):
+    # Keeps `from ai.knowledge import faq_system` working
+    if name == "faq_system":
+        return get_faq_system()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def simple_rag_lookup(question: str) -> Optional[str]:
     """
@@ -232,4 +788,18 @@ def simple_rag_lookup(question: str) -> Optional[str]:
     Returns:
         Answer if found in FAQs, None otherwise
     """
-    return faq_system.find_best_match(question)
+    return get_faq_system().find_best_match(question)
+
+def batch_rag_lookup(questions: List[str], k: int = 1, similarity_threshold: float = 0.25) -> List[List[dict]]:
+    """
+    Batch interface - top-k FAQ matches for many questions in one pass.
+    
+    Args:
+        questions: User questions
+        k: Candidates per question
+        similarity_threshold: Minimum similarity score (0.0-1.0)
+        
+    Returns:
+        One list of {"question", "answer", "score"} dicts per question
+    """
+    return get_faq_system().find_best_matches(questions, k=k, similarity_threshold=similarity_threshold)
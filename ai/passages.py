@@ -0,0 +1,203 @@
+"""
+Passage retrieval over the markdown knowledge base.
+
+``knowledge/knowledge.md`` is split into section-level passages, indexed with
+TF-IDF next to the FAQ index, and the few passages most relevant to a question
+are injected into the LLM prompt on FAQ misses.
+"""
+import hashlib
+import os
+import re
+from typing import Dict, List, Optional
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from config import KNOWLEDGE_FILE, PASSAGE_INDEX_DIR, PASSAGE_TOP_K, PASSAGE_MAX_CHARS, PASSAGE_MIN_SCORE
+from .index_store import save_tfidf_index, load_tfidf_index, vectorizer_params
+from .knowledge import TfidfScorer
+from utils.lazy import Lazy
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+_HEADING = re.compile(r'^(#{1,6})\s+(.*)$')
+_NON_WORD_PREFIX = re.compile(r'^[^\w]+', re.UNICODE)
+
+
+def _clean_heading(heading: str) -> str:
+    """Strip emoji and other decoration in front of a heading"""
+    return _NON_WORD_PREFIX.sub('', heading).strip()
+
+
+def _clean_text(text: str) -> str:
+    """Drop markdown emphasis and rules, keep the wording"""
+    text = text.replace('**', '').replace('__', '')
+    lines = [line.rstrip() for line in text.splitlines() if line.strip() not in ('---', '***')]
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+
+def split_markdown(text: str, max_chars: int = 1000) -> List[Dict[str, str]]:
+    """
+    Split markdown into section-level passages.
+
+    Each passage carries its heading path as a title. Sections longer than
+    ``max_chars`` are split on paragraph boundaries.
+
+    Args:
+        text: Markdown source
+        max_chars: Soft upper bound for a passage body
+
+    Returns:
+        List of {"title", "text"} dicts in document order
+    """
+    passages = []
+    path = []  # [(level, heading)]
+    body = []
+
+    def flush():
+        content = _clean_text('\n'.join(body))
+        body.clear()
+        if not content:
+            return
+        title = ' > '.join(heading for _, heading in path if heading)
+        chunk = []
+        size = 0
+        for paragraph in content.split('\n\n'):
+            if chunk and size + len(paragraph) > max_chars:
+                passages.append({"title": title, "text": '\n\n'.join(chunk)})
+                chunk, size = [], 0
+            chunk.append(paragraph)
+            size += len(paragraph)
+        if chunk:
+            passages.append({"title": title, "text": '\n\n'.join(chunk)})
+
+    for line in text.splitlines():
+        match = _HEADING.match(line)
+        if match:
+            flush()
+            level = len(match.group(1))
+            path = [(lvl, heading) for lvl, heading in path if lvl < level]
+            path.append((level, _clean_heading(match.group(2))))
+        else:
+            body.append(line)
+    flush()
+    return passages
+
+
+class PassageIndex:
+    def __init__(self, knowledge_file: str = KNOWLEDGE_FILE, index_dir: Optional[str] = PASSAGE_INDEX_DIR):
+        self.knowledge_file = knowledge_file
+        self.index_dir = index_dir
+        self.passages = []  # [{"title", "text"}]
+        self.vectorizer = self._new_vectorizer()
+        self.matrix = None
+        self._scorer = None
+        self._load()
+
+    @staticmethod
+    def _new_vectorizer(vocabulary: Optional[Dict[str, int]] = None) -> TfidfVectorizer:
+        """Create the passage vectorizer (no feature cap: passages are long and few)"""
+        return TfidfVectorizer(
+            stop_words='english',
+            lowercase=True,
+            max_features=None,
+            ngram_range=(1, 2),
+            vocabulary=vocabulary
+        )
+
+    def _load(self):
+        """Split the knowledge file and load or build its index"""
+        if not os.path.exists(self.knowledge_file):
+            logger.warning("Knowledge file not found: %s", self.knowledge_file)
+            return
+
+        with open(self.knowledge_file, 'rb') as f:
+            raw = f.read()
+        source_hash = hashlib.sha256(raw).hexdigest()
+        self.passages = split_markdown(raw.decode('utf-8'))
+        if not self.passages:
+            return
+
+        loaded = None
+        if self.index_dir:
+            try:
+                loaded = load_tfidf_index(self.index_dir, source_hash, vectorizer_params(self.vectorizer))
+            except Exception as e:
+                logger.warning("Ignoring unreadable passage index at %s: %s", self.index_dir, e)
+
+        postings = None
+        if loaded and loaded.matrix.shape[0] == len(self.passages):
+            self.matrix, postings = loaded.matrix, loaded.postings
+            self.vectorizer = self._new_vectorizer(loaded.vocabulary)
+            self.vectorizer.idf_ = loaded.idf
+        else:
+            documents = [f"{p['title']}\n{p['text']}" for p in self.passages]
+            self.matrix = self.vectorizer.fit_transform(documents)
+            if self.index_dir:
+                try:
+                    save_tfidf_index(self.index_dir, self.vectorizer, self.matrix, source_hash)
+                except Exception as e:
+                    logger.error("Error saving passage index: %s", e)
+
+        self._scorer = TfidfScorer(self.vectorizer, self.matrix, postings)
+        logger.info("Indexed %s knowledge passages from %s", len(self.passages), self.knowledge_file)
+
+    def retrieve(self, question: str, k: int = PASSAGE_TOP_K, min_score: float = PASSAGE_MIN_SCORE) -> List[Dict[str, str]]:
+        """
+        Find the passages most relevant to a question.
+
+        Args:
+            question: User question
+            k: Maximum passages to return
+            min_score: Minimum cosine similarity for a passage to count
+
+        Returns:
+            Passages ({"title", "text", "score"}), best first
+        """
+        if not self._scorer or not question.strip():
+            return []
+        return [
+            dict(self.passages[idx], score=score)
+            for idx, score in self._scorer.top_k(question.lower().strip(), k)
+            if score > min_score
+        ]
+
+    def build_context(self, question: str, k: int = PASSAGE_TOP_K, max_chars: int = PASSAGE_MAX_CHARS) -> str:
+        """
+        Format the top passages as a compact prompt context.
+
+        Returns:
+            Context text, or an empty string when nothing relevant was found
+        """
+        parts = []
+        used = 0
+        for passage in self.retrieve(question, k):
+            block = f"[{passage['title']}]\n{passage['text']}" if passage['title'] else passage['text']
+            if parts and used + len(block) > max_chars:
+                break
+            block = block[:max_chars - used]
+            parts.append(block)
+            used += len(block)
+        return '\n\n'.join(parts)
+
+
+# Global instance, built on first use
+_passage_index = Lazy(PassageIndex, "passage_index")
+
+
+def get_passage_index() -> PassageIndex:
+    """Return the shared PassageIndex, loading it on first call"""
+    return _passage_index.get()
+
+
+def retrieve_context(question: str) -> str:
+    """
+    Main interface function - relevant knowledge base excerpts for a question.
+
+    Args:
+        question: User's question
+
+    Returns:
+        Context text for the LLM prompt (empty if nothing relevant)
+    """
+    return get_passage_index().build_context(question)
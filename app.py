@@ -1,29 +1,86 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi.responses import Response, StreamingResponse, FileResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from typing import List
+from contextlib import asynccontextmanager
 import asyncio
-import tempfile
+import json
+import re
 import os
-import base64
 from concurrent.futures import ThreadPoolExecutor
 import uvicorn
 
-from ai.chat import ask_chatgpt_stream
-from audio.stt import transcribe_with_whisper
-from audio.tts import tts_with_openai
+from ai.chat import ask_chatgpt_stream_async, batch_faq_lookup, get_async_client as get_chat_client
+from audio.stt import transcribe_audio_bytes, get_client as get_stt_client
+from audio.tts import AUDIO_MEDIA_TYPE, synthesize_speech_cached, get_client as get_tts_client
+from audio.store import get_audio_store
+from audio.prerender import load_faq_audio
+from config import WEB_WORKERS
+from security_config import (
+    ALLOWED_ORIGINS, MAX_BATCH_QUESTIONS, MAX_FILE_SIZE, MAX_TEXT_LENGTH, validate_audio_extension, validate_origin
+)
+from audio.pipeline import SpeechPipeline
+from utils.singleflight import SingleFlight
+from utils.upload import UploadError, read_audio_upload
+from utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, render as render_metrics
+from utils.log import RequestIdMiddleware, bind_request_id, get_logger
+
+logger = get_logger("app")
+
+def _warm_faq_index():
+    from ai.knowledge import get_faq_system
+    get_faq_system()
+
+def _warm_passages():
+    from ai.passages import get_passage_index
+    get_passage_index()
+
+# Heavy components are built lazily; warm them all concurrently at startup
+WARMUP_COMPONENTS = {
+    "faq_index": _warm_faq_index,
+    "passages": _warm_passages,
+    "chat_client": get_chat_client,
+    "stt_client": get_stt_client,
+    "tts_client": get_tts_client,
+    "audio_store": get_audio_store,
+    "faq_audio": load_faq_audio,  # Pins FAQ clips against disk eviction and preloads them into the memory LRU
+}
+warmup_status = {name: "pending" for name in WARMUP_COMPONENTS}
+
+async def warmup():
+    """Build every heavy component in parallel threads, recording progress in warmup_status"""
+    async def build(name, factory):
+        warmup_status[name] = "loading"
+        try:
+            await asyncio.to_thread(factory)
+            warmup_status[name] = "ready"
+        except Exception as e:
+            logger.error("Warmup failed for %s: %s", name, e)
+            warmup_status[name] = "error"
+    
+    await asyncio.gather(*(build(name, factory) for name, factory in WARMUP_COMPONENTS.items()))
+    logger.info("Warmup complete")
 
-app = FastAPI(title="Riva AI Assistant", version="2.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start serving immediately; /api/ready reports when warmup has finished
+    warmup_task = asyncio.create_task(warmup())
+    yield
+    warmup_task.cancel()
+
+app = FastAPI(title="Riva AI Assistant", version="2.0", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["http://localhost:5000", "http://127.0.0.1:5000"],
+    allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["GET", "POST"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestIdMiddleware)  # Request IDs on every log line and response
 
 # Serve React build
 try:
@@ -34,16 +91,23 @@ except:
 # Thread pool for CPU-bound tasks
 executor = ThreadPoolExecutor(max_workers=2)
 
-# Audio cache
-audio_cache = {}
+# Speech pipelines by cache_key: sentence audio is synthesized while the answer streams
+speech_pipelines = {}
+AUDIO_RETENTION = 60  # Seconds audio stays fetchable after synthesis finishes (coalesced clients share it)
+SEGMENT_WAIT = 10  # Seconds a segment request waits before answering "processing"
 
-# Pydantic models
-class AudioRequest(BaseModel):
-    audio: str
+# Identical concurrent questions share one LLM stream and, through it, one speech pipeline
+llm_flights = SingleFlight("llm")
 
+# Pydantic models
 class TextRequest(BaseModel):
     text: str
 
+class BatchRequest(BaseModel):
+    questions: List[str]
+    k: int = 1
+    threshold: float = 0.25
+
 @app.get("/")
 async def index():
     try:
@@ -51,104 +115,365 @@ async def index():
     except:
         return {"message": "Run: cd frontend && npm run build"}
 
+@app.get("/api/ready")
+async def ready():
+    is_ready = all(status == "ready" for status in warmup_status.values())
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={"ready": is_ready, "components": warmup_status}
+    )
+
 @app.get("/favicon.ico")
 async def favicon():
     return {"status": "ok"}
 
 @app.post("/api/transcribe")
-async def transcribe_audio(request: AudioRequest):
+async def transcribe_audio(request: Request, filename: str = None):
+    """
+    Transcribe a recording uploaded as a raw audio body (``Content-Type: audio/webm``,
+    or any type with ``?filename=recording.webm``) or as a multipart file.
+    
+    The upload is streamed into memory and handed to Whisper as a file object:
+    no base64, no temp file. Size and format limits apply while it is read.
+    """
     try:
-        if not request.audio:
-            raise HTTPException(status_code=400, detail="No audio data provided")
-        
-        audio_bytes = base64.b64decode(request.audio.split(',')[1])
-        
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as f:
-            f.write(audio_bytes)
-            wav_path = f.name
-        
-        # Run transcription in thread pool
-        loop = asyncio.get_event_loop()
-        user_text = await loop.run_in_executor(executor, transcribe_with_whisper, wav_path)
-        
-        try:
-            os.unlink(wav_path)
-        except:
-            pass
-        
-        if not user_text:
-            raise HTTPException(status_code=400, detail="No speech detected")
-            
-        return {"transcript": user_text}
-
-    except HTTPException:
-        raise
+        filename, audio = await read_audio_upload(
+            request.stream(),
+            request.headers.get("content-type", ""),
+            filename,
+            request.headers.get("content-length"),
+        )
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    
+    try:
+        user_text = await asyncio.to_thread(transcribe_audio_bytes, audio, filename)
     except Exception as e:
-        print(f"Transcription error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Transcription error: %s", e)
         raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
+    
+    if not user_text:
+        raise HTTPException(status_code=400, detail="No speech detected")
+    return {"transcript": user_text}
 
-async def generate_and_cache_audio(text: str, cache_key: str):
-    """Generate TTS audio in background"""
+async def answer_and_speak(text: str, pipeline: SpeechPipeline):
+    """Stream the answer, feeding every chunk to the speech pipeline as it arrives"""
     try:
-        with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as f:
-            tts_path = f.name
-        
-        await tts_with_openai(text, tts_path)
-        
-        with open(tts_path, 'rb') as f:
-            audio_response = base64.b64encode(f.read()).decode()
-        
-        os.unlink(tts_path)
-        audio_cache[cache_key] = f'data:audio/mp3;base64,{audio_response}'
-        
-    except Exception as e:
-        print(f"TTS Error: {e}")
-        audio_cache[cache_key] = "error"
+        async for chunk in ask_chatgpt_stream_async(text):
+            await pipeline.feed(chunk)
+            yield chunk
+    finally:
+        await pipeline.close()
+
+async def release_pipeline(cache_key: str, pipeline: SpeechPipeline):
+    """Drop a finished pipeline once clients have had time to fetch its audio"""
+    await pipeline.wait_finished()
+    await asyncio.sleep(AUDIO_RETENTION)
+    if speech_pipelines.get(cache_key) is pipeline:
+        del speech_pipelines[cache_key]
+
+def audio_response(request: Request, audio: bytes) -> Response:
+    """Serve audio bytes, honouring a single-range ``Range: bytes=start-end`` header"""
+    headers = {"Accept-Ranges": "bytes", "Cache-Control": "no-store"}
+    size = len(audio)
+    match = re.fullmatch(r'bytes=(\d*)-(\d*)', request.headers.get("range", "").strip())
+    if not match or match.groups() == ("", ""):
+        return Response(audio, media_type=AUDIO_MEDIA_TYPE, headers=headers)
+    
+    start, end = match.groups()
+    if start:
+        start, end = int(start), min(int(end) if end else size - 1, size - 1)
+    else:
+        start, end = max(size - int(end), 0), size - 1  # Suffix range: last N bytes
+    if start > end or start >= size:
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(status_code=416, headers=headers)
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return Response(audio[start:end + 1], status_code=206, media_type=AUDIO_MEDIA_TYPE, headers=headers)
+
+def start_answer(text: str):
+    """
+    Subscribe to the answer for a question, sharing it with identical questions in flight.
+    
+    Returns:
+        (async iterator of text chunks, SpeechPipeline with the answer's sentence audio)
+    """
+    cache_key = text.lower().strip()
+    
+    def start_flight():
+        # Runs once per flight, before the response starts, so audio requests find the pipeline
+        pipeline = SpeechPipeline(synthesize_speech_cached)
+        speech_pipelines[cache_key] = pipeline
+        asyncio.create_task(release_pipeline(cache_key, pipeline))
+        return answer_and_speak(text, pipeline)
+    
+    chunks = llm_flights.stream(cache_key, start_flight)
+    return chunks, speech_pipelines[cache_key]
 
 @app.post("/api/text_stream")
 async def process_text_stream(request: TextRequest):
     if not request.text or len(request.text) > 1000:
         raise HTTPException(status_code=400, detail="Invalid text")
     
-    cache_key = request.text.lower().strip()
+    chunks, _ = start_answer(request.text)
+    return StreamingResponse(chunks, media_type="text/plain")
+
+@app.websocket("/ws/voice")
+async def voice_session(websocket: WebSocket):
+    """
+    Full-duplex voice session.
+    
+    Client -> server:
+        binary frames: audio of the current utterance (any container Whisper accepts)
+        {"type": "start", "format": "webm"}: begin an utterance (optional, sets the format)
+        {"type": "end"}: utterance complete - transcribe and answer it
+        {"type": "text", "text": "..."}: answer a typed question
+    Server -> client:
+        {"type": "transcript", "text"}, {"type": "text", "text"} per chunk,
+        {"type": "audio", "index", "format": "mp3", "key"} followed by one binary frame
+        with that sentence's audio, {"type": "done"}, {"type": "error", "detail"}
     
-    async def stream_generator():
-        full_response = []
-        
-        # Stream text response
-        for chunk in ask_chatgpt_stream(request.text):
-            yield chunk
-            full_response.append(chunk)
-        
-        # Start audio generation in background
-        final_text = "".join(full_response)
-        asyncio.create_task(generate_and_cache_audio(final_text, cache_key))
+    A new utterance while an answer is still playing out cancels that answer (barge-in).
+    Handshakes from origins outside ALLOWED_ORIGINS are refused (policy violation, 1008).
+    """
+    if not validate_origin(websocket.headers.get("origin")):
+        logger.warning("Rejected voice session from origin %s", websocket.headers.get("origin"))
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    send_lock = asyncio.Lock()  # Keeps each audio header and its binary frame together
+    buffer = bytearray()
+    oversized = False  # Utterance exceeded MAX_FILE_SIZE: drop its frames until the next "start"
+    audio_format = "webm"
+    answer_task = None
+    
+    async def send_json(message: dict):
+        async with send_lock:
+            await websocket.send_json(message)
+    
+    async def send_audio(pipeline: SpeechPipeline):
+        index = 0
+        while True:
+            try:
+                clip = await pipeline.segment(index)
+            except Exception as e:
+                logger.error("TTS error: %s", e)
+                clip = False
+            if clip is None:
+                return
+            if clip:
+                async with send_lock:
+                    await websocket.send_json({"type": "audio", "index": index, "format": "mp3", "key": clip.key})
+                    await websocket.send_bytes(clip.audio)
+            index += 1
+    
+    async def answer(text: str):
+        try:
+            chunks, pipeline = start_answer(text)
+            audio_task = asyncio.create_task(send_audio(pipeline))
+            try:
+                async for chunk in chunks:
+                    await send_json({"type": "text", "text": chunk})
+                await audio_task
+            finally:
+                audio_task.cancel()
+            await send_json({"type": "done"})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Voice session error: %s", e)
+            try:
+                await send_json({"type": "error", "detail": "Failed to answer"})
+            except Exception:
+                pass  # Client already gone
     
-    return StreamingResponse(stream_generator(), media_type="text/plain")
+    async def transcribe_and_answer(audio_bytes: bytes, filename: str):
+        try:
+            transcript = await asyncio.to_thread(transcribe_audio_bytes, audio_bytes, filename)
+        except Exception as e:
+            logger.error("Transcription error: %s", e)
+            await send_json({"type": "error", "detail": "Transcription failed"})
+            return
+        await send_json({"type": "transcript", "text": transcript})
+        if not transcript:
+            await send_json({"type": "error", "detail": "No speech detected"})
+            return
+        await answer(transcript[:MAX_TEXT_LENGTH])
+    
+    def run(coro):
+        nonlocal answer_task
+        if answer_task and not answer_task.done():
+            answer_task.cancel()
+        bind_request_id()  # Each utterance gets its own ID; the task copies it
+        answer_task = asyncio.create_task(coro)
+    
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                if oversized:
+                    continue
+                if len(buffer) + len(message["bytes"]) > MAX_FILE_SIZE:
+                    buffer.clear()
+                    oversized = True
+                    await send_json({"type": "error", "detail": "Audio too large"})
+                    continue
+                buffer.extend(message["bytes"])
+                continue
+            
+            try:
+                event = json.loads(message.get("text") or "")
+            except ValueError:
+                await send_json({"type": "error", "detail": "Invalid message"})
+                continue
+            kind = event.get("type")
+            if kind == "start":
+                buffer.clear()
+                oversized = False
+                audio_format = str(event.get("format", "webm")).lower().lstrip(".")
+                if not validate_audio_extension(f"audio.{audio_format}"):
+                    await send_json({"type": "error", "detail": f"Unsupported audio format: {audio_format}"})
+                    audio_format = "webm"
+            elif kind == "end":
+                if oversized:
+                    oversized = False  # Already reported; nothing to transcribe
+                    continue
+                if not buffer:
+                    await send_json({"type": "error", "detail": "No audio data provided"})
+                    continue
+                audio_bytes = bytes(buffer)
+                buffer.clear()
+                run(transcribe_and_answer(audio_bytes, f"audio.{audio_format}"))
+            elif kind == "text":
+                text = str(event.get("text", "")).strip()
+                if not text or len(text) > MAX_TEXT_LENGTH:
+                    await send_json({"type": "error", "detail": "Invalid text"})
+                    continue
+                run(answer(text))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if answer_task:
+            answer_task.cancel()
 
-@app.get("/api/get_audio/{cache_key}")
-async def get_audio(cache_key: str):
+@app.post("/api/faq/batch")
+async def faq_batch(request: BatchRequest):
+    if not request.questions or len(request.questions) > MAX_BATCH_QUESTIONS:
+        raise HTTPException(status_code=400, detail=f"Provide 1-{MAX_BATCH_QUESTIONS} questions")
+    if any(len(q) > MAX_TEXT_LENGTH for q in request.questions):
+        raise HTTPException(status_code=400, detail="Question too long")
+    if not 1 <= request.k <= 20:
+        raise HTTPException(status_code=400, detail="k must be between 1 and 20")
+    
+    # Scoring is CPU-bound; keep it off the event loop
+    loop = asyncio.get_event_loop()
+    matches = await loop.run_in_executor(
+        executor, batch_faq_lookup, request.questions, request.k, request.threshold
+    )
+    return {"results": matches}
+
+@app.get("/api/get_audio/{cache_key}/{index}")
+async def get_audio_segment(cache_key: str, index: int, request: Request):
+    """
+    Long-poll for sentence ``index`` of an answer's audio (segments arrive in text order).
+    
+    Returns the MP3 bytes (200/206), 202 while it is still being produced,
+    204 once the answer has no more segments and 502 if that sentence failed.
+    """
     cache_key = cache_key.lower().strip()
-    audio_data = audio_cache.get(cache_key)
-    
-    if audio_data and audio_data != "processing":
-        audio_cache.pop(cache_key, None)  # Clean up
-        return {"status": "ready", "audio": audio_data}
-    elif not audio_data:
-        audio_cache[cache_key] = "processing"
-        return {"status": "processing"}
-    else:
-        return {"status": "processing"}
+    pipeline = speech_pipelines.get(cache_key)
+    for _ in range(10):  # The question may still be on its way to /api/text_stream
+        if pipeline is not None:
+            break
+        await asyncio.sleep(0.1)
+        pipeline = speech_pipelines.get(cache_key)
+    if pipeline is None or index < 0:
+        return Response(status_code=202)
+    try:
+        clip = await asyncio.wait_for(pipeline.segment(index), timeout=SEGMENT_WAIT)
+    except asyncio.TimeoutError:
+        return Response(status_code=202)
+    except Exception as e:
+        logger.error("TTS error: %s", e)
+        return Response(status_code=502)
+    if clip is None:
+        return Response(status_code=204, headers={"X-Audio-Segments": str(len(pipeline))})
+    response = audio_response(request, clip.audio)
+    response.headers["X-Audio-Key"] = clip.key  # Permanent URL: /api/audio/{key}
+    return response
+
+@app.get("/api/get_audio/{cache_key}")
+async def get_audio(cache_key: str, request: Request):
+    """
+    Whole-answer audio (MP3 segments concatenated).
+    
+    Once every sentence is synthesized the bytes are served with range support;
+    before that the response streams each segment as soon as it is ready.
+    """
+    pipeline = speech_pipelines.get(cache_key.lower().strip())
+    if pipeline is None:
+        return Response(status_code=202)
+    
+    if pipeline.finished:
+        segments = []
+        for index in range(len(pipeline)):
+            try:
+                segments.append((await pipeline.segment(index)).audio)
+            except Exception:
+                pass
+        if not segments:
+            return Response(status_code=502)
+        return audio_response(request, b"".join(segments))
+    
+    async def stream_segments():
+        index = 0
+        while True:
+            try:
+                clip = await pipeline.segment(index)
+            except Exception:
+                clip = False  # Skip a failed sentence
+            if clip is None:
+                return
+            if clip:
+                yield clip.audio
+            index += 1
+    
+    return StreamingResponse(stream_segments(), media_type=AUDIO_MEDIA_TYPE, headers={"Cache-Control": "no-store"})
+
+@app.get("/metrics")
+async def metrics():
+    """Per-stage latency histograms and counters in Prometheus text format (per worker)"""
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/api/audio/stats")
+async def audio_store_stats():
+    return get_audio_store().stats()
+
+@app.get("/api/audio/{key}")
+async def get_stored_audio(key: str, request: Request):
+    """Serve a synthesized clip by content key (immutable, so clients may cache it forever)"""
+    if not re.fullmatch(r'[0-9a-f]{64}', key):
+        raise HTTPException(status_code=404, detail="Unknown audio")
+    audio = await asyncio.to_thread(get_audio_store().get, key)
+    if audio is None:
+        raise HTTPException(status_code=404, detail="Unknown audio")
+    response = audio_response(request, audio)
+    response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    response.headers["ETag"] = f'"{key}"'
+    return response
 
 if __name__ == "__main__":
-    print("✅ Loaded FAQs")
+    from ai.knowledge import prepare_shared_index  # numpy/scipy/sklearn stay out of the workers' import
+    if WEB_WORKERS > 1 and prepare_shared_index():
+        os.environ["FAQ_SHARED_INDEX"] = "true"  # Workers map one index instead of each building their own
+    logger.info("Loaded FAQs")
     uvicorn.run(
         "app:app",
         host="127.0.0.1",
         port=5000,
         reload=False,
-        workers=1,
+        workers=WEB_WORKERS,
         log_level="info"
     )
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""
+In-memory compression of recordings before speech-to-text.
+
+Raw 16-bit PCM at 16kHz is about 32KB per second, and on venue Wi-Fi the
+upload dominates Whisper's latency. Recordings are therefore encoded to Opus
+(in an Ogg container, several times smaller) or lossless FLAC with the
+optional ``soundfile`` package before they are sent. Without it - or with a
+libsndfile build lacking the codec - the next format in the chain is used,
+down to plain WAV.
+"""
+import io
+from typing import Tuple
+
+import numpy as np
+import scipy.io.wavfile as wavfile
+
+from config import SAMPLE_RATE, STT_UPLOAD_FORMAT
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import soundfile as sf
+    SOUNDFILE_AVAILABLE = True
+except ImportError:
+    SOUNDFILE_AVAILABLE = False
+
+# {format: (libsndfile container, subtype, extension Whisper recognises)}
+FORMATS = {
+    "opus": ("OGG", "OPUS", ".ogg"),
+    "flac": ("FLAC", "PCM_16", ".flac"),
+}
+FALLBACKS = {"opus": "flac", "flac": "wav"}
+OPUS_SAMPLE_RATES = {8000, 12000, 16000, 24000, 48000}
+
+_unavailable = set()  # Formats that failed once; not retried for every recording
+
+
+def encode_wav(samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """Encode int16 samples as an in-memory WAV file"""
+    buffer = io.BytesIO()
+    wavfile.write(buffer, sample_rate, samples)
+    return buffer.getvalue()
+
+
+def _encode_soundfile(samples: np.ndarray, sample_rate: int, fmt: str) -> bytes:
+    container, subtype, _ = FORMATS[fmt]
+    buffer = io.BytesIO()
+    sf.write(buffer, samples, sample_rate, format=container, subtype=subtype)
+    return buffer.getvalue()
+
+
+def encode_audio(samples: np.ndarray, sample_rate: int = SAMPLE_RATE,
+                 fmt: str = STT_UPLOAD_FORMAT) -> Tuple[bytes, str]:
+    """
+    Compress int16 samples for upload.
+
+    Args:
+        samples: Mono int16 audio
+        sample_rate: Its sample rate (Opus needs 8, 12, 16, 24 or 48kHz)
+        fmt: "opus", "flac" or "wav"; unavailable formats fall back along opus -> flac -> wav
+
+    Returns:
+        (encoded bytes, filename whose extension tells Whisper the format)
+    """
+    while fmt in FORMATS:
+        usable = fmt != "opus" or sample_rate in OPUS_SAMPLE_RATES
+        if SOUNDFILE_AVAILABLE and usable and fmt not in _unavailable:
+            try:
+                data = _encode_soundfile(samples, sample_rate, fmt)
+                logger.debug("Encoded %.1fs of audio as %s: %d bytes (%.0f%% of WAV)",
+                             len(samples) / sample_rate, fmt, len(data),
+                             100 * len(data) / max(1, 2 * len(samples)))
+                return data, f"audio{FORMATS[fmt][2]}"
+            except Exception as e:
+                logger.warning("%s encoding unavailable, falling back to %s: %s", fmt, FALLBACKS[fmt], e)
+                _unavailable.add(fmt)
+        fmt = FALLBACKS[fmt]
+    return encode_wav(samples, sample_rate), "audio.wav"
+
+
+def compress_wav_file(path: str, fmt: str = STT_UPLOAD_FORMAT) -> Tuple[bytes, str]:
+    """
+    Read a 16-bit PCM WAV recording and compress it with ``encode_audio``.
+
+    Returns:
+        (encoded bytes, filename)
+    """
+    sample_rate, samples = wavfile.read(path)
+    return encode_audio(samples, sample_rate, fmt)
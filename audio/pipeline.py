@@ -0,0 +1,131 @@
+"""
+Sentence-level speech pipeline.
+
+LLM chunks are fed in as they stream; every completed sentence is handed to
+TTS immediately (with bounded concurrency) while the model keeps generating.
+Segments are numbered in text order, so a client can start playing segment 0
+while later sentences are still being written or synthesized.
+"""
+import asyncio
+import re
+from typing import Any, Awaitable, Callable, List, Optional
+
+from config import TTS_MIN_SEGMENT_CHARS, TTS_MAX_SEGMENT_CHARS, TTS_SEGMENT_CONCURRENCY
+
+# Sentence end: terminal punctuation (optionally closed by quotes/brackets) followed by whitespace
+_SENTENCE_END = re.compile(r'[.!?…]+["\')\]]*\s+|\n+')
+_ABBREVIATIONS = {"dr", "mr", "mrs", "ms", "prof", "sr", "jr", "st", "vs", "etc", "e.g", "i.e", "no"}
+
+
+class SentenceSplitter:
+    """Incrementally split streamed text into speakable sentences"""
+
+    def __init__(self, min_chars: int = TTS_MIN_SEGMENT_CHARS, max_chars: int = TTS_MAX_SEGMENT_CHARS):
+        """
+        Args:
+            min_chars: Shorter sentences are merged with the next one (fewer, fuller TTS calls)
+            max_chars: Longer runs without a sentence end are cut at a word boundary
+        """
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+
+    def feed(self, chunk: str) -> List[str]:
+        """Add streamed text and return the sentences it completed"""
+        self._buffer += chunk
+        sentences = []
+        start = 0
+        for match in _SENTENCE_END.finditer(self._buffer):
+            candidate = self._buffer[start:match.end()].strip()
+            last_word = candidate.rstrip('.!?…"\')] ').rsplit(None, 1)[-1].lower() if candidate else ""
+            if len(candidate) < self.min_chars or last_word in _ABBREVIATIONS:
+                continue  # Keep accumulating: too short, or "Dr." is not a sentence end
+            sentences.append(candidate)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+
+        while len(self._buffer) > self.max_chars:
+            cut = self._buffer.rfind(' ', 0, self.max_chars)
+            if cut <= 0:
+                cut = self.max_chars
+            sentences.append(self._buffer[:cut].strip())
+            self._buffer = self._buffer[cut:].lstrip()
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        """Return whatever text is left once the stream has ended"""
+        rest, self._buffer = self._buffer.strip(), ""
+        return rest or None
+
+
+class SpeechPipeline:
+    def __init__(self, synthesize: Callable[[str], Awaitable[Any]],
+                 max_concurrency: int = TTS_SEGMENT_CONCURRENCY):
+        """
+        Args:
+            synthesize: Coroutine function turning one sentence into audio
+            max_concurrency: Sentences synthesized at the same time
+        """
+        self._synthesize = synthesize
+        self._splitter = SentenceSplitter()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._changed = asyncio.Condition()
+        self.texts: List[str] = []  # Segment text, in order
+        self._tasks: List[asyncio.Task] = []
+        self.closed = False
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    @property
+    def finished(self) -> bool:
+        """True once the text has ended and every segment's synthesis has completed"""
+        return self.closed and all(task.done() for task in self._tasks)
+
+    async def feed(self, chunk: str):
+        """Queue TTS for every sentence the chunk completes"""
+        for sentence in self._splitter.feed(chunk):
+            await self._add(sentence)
+
+    async def close(self):
+        """Queue the trailing text and mark the segment list complete"""
+        rest = self._splitter.flush()
+        if rest:
+            await self._add(rest)
+        async with self._changed:
+            self.closed = True
+            self._changed.notify_all()
+
+    async def _add(self, text: str):
+        task = asyncio.get_running_loop().create_task(self._run(text))
+        async with self._changed:
+            self.texts.append(text)
+            self._tasks.append(task)
+            self._changed.notify_all()
+
+    async def _run(self, text: str):
+        async with self._semaphore:
+            return await self._synthesize(text)
+
+    async def segment(self, index: int):
+        """
+        Wait for segment ``index`` and return its audio.
+
+        Returns:
+            The synthesized audio, or None if the answer has fewer segments
+
+        Raises:
+            Whatever synthesis raised for this segment
+        """
+        async with self._changed:
+            await self._changed.wait_for(lambda: index < len(self._tasks) or self.closed)
+            if index >= len(self._tasks):
+                return None
+            task = self._tasks[index]
+        return await asyncio.shield(task)
+
+    async def wait_finished(self):
+        """Wait until the text has ended and every segment has been synthesized (errors ignored)"""
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.closed)
+        await asyncio.gather(*self._tasks, return_exceptions=True)
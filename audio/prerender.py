@@ -0,0 +1,180 @@
+"""
+Offline rendering of FAQ answer audio.
+
+FAQ answers are fixed text, so their speech is synthesized ahead of time into
+the audio store, split into sentences exactly as SpeechPipeline splits a FAQ
+answer at serving time. Every sentence of a FAQ hit is then already in the
+store and the answer is spoken without any TTS call. A manifest maps each
+answer's hash to its clip keys, so rebuilds and add_faq render only answers
+that changed, and the server pins those clips in the store at startup.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, Iterable, List
+
+from config import FAQ_AUDIO_MANIFEST, FAQ_PRERENDER_CONCURRENCY
+from .pipeline import SentenceSplitter
+from .store import get_audio_store
+from .tts import render_speech, speech_key
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+MANIFEST_VERSION = 1
+_manifest_lock = threading.Lock()  # Serializes read-modify-write of the manifest file
+
+
+def answer_hash(answer: str) -> str:
+    """Manifest key of an answer"""
+    return hashlib.sha256(answer.encode('utf-8')).hexdigest()
+
+
+def answer_segments(answer: str) -> List[str]:
+    """Split an answer the way SpeechPipeline splits it when it arrives as one chunk"""
+    splitter = SentenceSplitter()
+    segments = splitter.feed(answer)
+    rest = splitter.flush()
+    if rest:
+        segments.append(rest)
+    return segments
+
+
+def load_manifest(path: str = FAQ_AUDIO_MANIFEST) -> Dict[str, List[str]]:
+    """
+    Read the manifest.
+
+    Returns:
+        {answer hash: clip keys in segment order}, empty if missing or unreadable
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data.get("answers", {})
+
+
+def _save_manifest(answers: Dict[str, List[str]], path: str):
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump({"version": MANIFEST_VERSION, "answers": answers}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+async def prerender_answers(answers: Iterable[str], concurrency: int = FAQ_PRERENDER_CONCURRENCY,
+                            manifest_path: str = FAQ_AUDIO_MANIFEST, prune: bool = False,
+                            drop: Iterable[str] = ()) -> dict:
+    """
+    Render every sentence of the given answers that is not in the audio store yet.
+
+    Args:
+        answers: FAQ answer texts
+        concurrency: TTS calls in flight at once
+        manifest_path: Manifest to update
+        prune: Drop manifest entries for answers not in ``answers`` (full rebuild)
+        drop: Answers to remove from the manifest (replaced by add_faq)
+
+    Returns:
+        Counts of answers, rendered and already-cached clips, and failures
+    """
+    store = get_audio_store()
+    semaphore = asyncio.Semaphore(concurrency)
+    plans = {}  # {answer hash: [(segment text, expected key)]}
+    for answer in answers:
+        if answer and answer.strip():
+            plans.setdefault(answer_hash(answer), [(text, speech_key(text)) for text in answer_segments(answer)])
+
+    stats = {"answers": len(plans), "rendered": 0, "cached": 0, "failed": 0}
+    missing = {}
+    for segments in plans.values():
+        for text, key in segments:
+            if key in missing:
+                continue
+            if key in store:
+                stats["cached"] += 1
+            else:
+                missing[key] = text
+
+    async def render(key, text):
+        async with semaphore:
+            try:
+                clip = await render_speech(text)
+            except Exception as e:
+                logger.error("Pre-render failed for '%s': %s", text[:40], e)
+                stats["failed"] += 1
+                return
+        if clip.key == key:
+            stats["rendered"] += 1
+        else:
+            stats["failed"] += 1  # Fallback voice: the serving path would not find it
+
+    await asyncio.gather(*(render(key, text) for key, text in missing.items()))
+
+    complete = {h: [key for _, key in segments] for h, segments in plans.items()
+                if all(key in store for _, key in segments)}
+    store.pin(key for keys in complete.values() for key in keys)
+
+    dropped = {answer_hash(answer) for answer in drop} - set(plans)
+    with _manifest_lock:
+        manifest = load_manifest(manifest_path)
+        stale = set(manifest) - set(plans) if prune else dropped
+        for h in stale:
+            store.unpin(manifest.pop(h, []))
+        manifest.update(complete)
+        _save_manifest(manifest, manifest_path)
+    return stats
+
+
+def prerender_faq_audio(faqs=None, concurrency: int = FAQ_PRERENDER_CONCURRENCY) -> dict:
+    """
+    Render audio for every FAQ answer and rewrite the manifest (blocking).
+
+    Args:
+        faqs: {question: answer}; defaults to the shared FAQ system
+        concurrency: TTS calls in flight at once
+    """
+    if faqs is None:
+        from ai.knowledge import get_faq_system
+        faqs = get_faq_system().faqs
+    return asyncio.run(prerender_answers(list(faqs.values()), concurrency, prune=True))
+
+
+def refresh_answer_audio(answer: str, previous: str = None):
+    """
+    Render audio for an added or changed FAQ answer in a background thread.
+
+    Args:
+        answer: The new answer
+        previous: The answer it replaced, dropped from the manifest
+    """
+    if answer == previous:
+        return
+    drop = [previous] if previous else []
+
+    def run():
+        try:
+            asyncio.run(prerender_answers([answer], drop=drop))
+        except Exception as e:
+            logger.error("FAQ audio refresh failed: %s", e)
+
+    threading.Thread(target=run, name="faq-audio", daemon=True).start()
+
+
+def load_faq_audio(path: str = FAQ_AUDIO_MANIFEST) -> int:
+    """
+    Pin pre-rendered FAQ clips in the audio store and load them into memory.
+
+    Returns:
+        Number of clips pinned
+    """
+    keys = [key for keys in load_manifest(path).values() for key in keys]
+    get_audio_store().pin(keys, load=True)
+    return len(keys)
@@ -1,23 +1,289 @@
-import sounddevice as sd
+"""
+Microphone capture with voice-activity-detection endpointing.
+
+Audio is read from a ``sounddevice.InputStream`` in fixed frames. A detector
+classifies frames as speech or not (vectorized energy + zero-crossing rate by
+default; anything with ``is_speech(frames)`` can be plugged in) and an
+``Endpointer`` starts the utterance on speech - keeping a short pre-roll from
+a ring buffer - and ends it after a trailing silence or at a duration cap. A
+short question is therefore captured in roughly its own length instead of a
+fixed window, and a long one is no longer cut off.
+"""
+import queue
+from collections import deque
+from contextlib import closing
+from typing import Iterable, Iterator, List, Optional
+
 import numpy as np
 import scipy.io.wavfile as wavfile
-from config import SAMPLE_RATE
 
-def record_to_wav(filename, seconds=6, sample_rate=SAMPLE_RATE):
+from config import (
+    SAMPLE_RATE, RECORD_SECONDS, VAD_ENABLED, VAD_FRAME_MS, VAD_MIN_SPEECH_MS, VAD_TRAILING_SILENCE_MS,
+    VAD_PRE_ROLL_MS, VAD_MAX_SECONDS, VAD_START_TIMEOUT, VAD_ENERGY_MARGIN_DB,
+    STT_SEGMENT_MIN_SECONDS, STT_SEGMENT_PAUSE_MS
+)
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class EnergyZcrDetector:
+    """
+    Speech/non-speech per frame from loudness and zero-crossing rate.
+
+    A frame is speech when its RMS level is ``margin_db`` above an adaptive
+    noise floor and its zero-crossing rate is below that of broadband hiss.
+    """
+
+    def __init__(self, margin_db: float = VAD_ENERGY_MARGIN_DB, min_db: float = -50.0,
+                 max_zcr: float = 0.35, adapt: float = 0.05):
+        """
+        Args:
+            margin_db: Required level above the noise floor
+            min_db: Absolute minimum level (dBFS) for speech, for near-silent rooms
+            max_zcr: Frames crossing zero more often than this are treated as noise
+            adapt: How quickly the noise floor follows non-speech frames (0-1)
+        """
+        self.margin_db = margin_db
+        self.min_db = min_db
+        self.max_zcr = max_zcr
+        self.adapt = adapt
+        self.noise_db = None
+
+    def is_speech(self, frames: np.ndarray) -> np.ndarray:
+        """
+        Classify frames.
+
+        Args:
+            frames: int16 array of shape (n_frames, frame_samples)
+
+        Returns:
+            Boolean array of shape (n_frames,)
+        """
+        x = frames.astype(np.float32) / 32768.0
+        level_db = 20 * np.log10(np.sqrt(np.mean(x * x, axis=1)) + 1e-10)
+        signs = np.signbit(x).astype(np.int8)
+        zcr = np.mean(np.abs(np.diff(signs, axis=1)), axis=1)
+
+        if self.noise_db is None:
+            self.noise_db = min(float(level_db.min()), self.min_db + self.margin_db)
+        speech = (level_db > max(self.noise_db + self.margin_db, self.min_db)) & (zcr < self.max_zcr)
+
+        quiet = level_db[~speech]
+        if quiet.size:
+            self.noise_db += self.adapt * (float(quiet.mean()) - self.noise_db)
+        return speech
+
+
+class WebRtcDetector:
+    """Adapter for the optional ``webrtcvad`` package (frames of 10, 20 or 30 ms)"""
+
+    def __init__(self, aggressiveness: int = 2, sample_rate: int = SAMPLE_RATE):
+        import webrtcvad  # Optional dependency
+        self._vad = webrtcvad.Vad(aggressiveness)
+        self.sample_rate = sample_rate
+
+    def is_speech(self, frames: np.ndarray) -> np.ndarray:
+        return np.array([self._vad.is_speech(frame.astype(np.int16).tobytes(), self.sample_rate)
+                         for frame in frames], dtype=bool)
+
+
+class Endpointer:
+    """
+    Turn a stream of audio blocks into one utterance.
+
+    ``push`` returns the samples that belong to the utterance as soon as they
+    are known: nothing while waiting for speech, then the pre-roll, then every
+    frame until the trailing silence or the cap ends it.
+    """
+
+    def __init__(self, detector=None, sample_rate: int = SAMPLE_RATE, frame_ms: int = VAD_FRAME_MS,
+                 min_speech_ms: int = VAD_MIN_SPEECH_MS, trailing_silence_ms: int = VAD_TRAILING_SILENCE_MS,
+                 pre_roll_ms: int = VAD_PRE_ROLL_MS, max_seconds: float = VAD_MAX_SECONDS,
+                 start_timeout: float = VAD_START_TIMEOUT):
+        """
+        Args:
+            detector: Object with ``is_speech(frames) -> bool array`` (default EnergyZcrDetector)
+            sample_rate: Samples per second
+            frame_ms: Analysis frame length
+            min_speech_ms: Consecutive speech that starts the utterance
+            trailing_silence_ms: Silence that ends it
+            pre_roll_ms: Audio kept from before the start
+            max_seconds: Cap on the utterance length
+            start_timeout: Seconds of no speech before giving up
+        """
+        self.detector = detector or EnergyZcrDetector()
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.trailing_frames = max(1, trailing_silence_ms // frame_ms)
+        self.max_samples = int(max_seconds * sample_rate)
+        self.start_timeout_frames = int(start_timeout * 1000 / frame_ms)
+        self._pre_roll = deque(maxlen=max(pre_roll_ms // frame_ms, self.min_speech_frames))  # Ring buffer
+        self._pending = np.zeros(0, dtype=np.int16)
+        self._speech_run = 0
+        self.silence_frames = 0  # Current run of non-speech frames inside the utterance
+        self._waited = 0
+        self.samples = 0  # Utterance samples emitted so far
+        self.started = False
+        self.done = False
+        self.reason = None  # "silence", "max_duration" or "no_speech"
+
+    def push(self, block: np.ndarray) -> List[np.ndarray]:
+        """Feed captured int16 samples; return the utterance audio they complete (possibly empty)"""
+        if self.done:
+            return []
+        data = np.concatenate([self._pending, np.asarray(block, dtype=np.int16).reshape(-1)])
+        n_frames = len(data) // self.frame_samples
+        self._pending = data[n_frames * self.frame_samples:]
+        if not n_frames:
+            return []
+        frames = data[:n_frames * self.frame_samples].reshape(n_frames, self.frame_samples)
+
+        out = []
+        for frame, speech in zip(frames, self.detector.is_speech(frames)):
+            if self.started:
+                out.append(frame)
+                self.samples += len(frame)
+                self.silence_frames = 0 if speech else self.silence_frames + 1
+                if self.silence_frames >= self.trailing_frames:
+                    self._finish("silence")
+                elif self.samples >= self.max_samples:
+                    self._finish("max_duration")
+            else:
+                self._pre_roll.append(frame)
+                self._speech_run = self._speech_run + 1 if speech else 0
+                self._waited += 1
+                if self._speech_run >= self.min_speech_frames:
+                    self.started = True
+                    out.extend(self._pre_roll)
+                    self.samples += sum(len(f) for f in self._pre_roll)
+                    self._pre_roll.clear()
+                elif self._waited >= self.start_timeout_frames:
+                    self._finish("no_speech")
+            if self.done:
+                break
+        return out
+
+    def _finish(self, reason: str):
+        self.done = True
+        self.reason = reason
+
+
+def _microphone(sample_rate: int, blocksize: int, device=None) -> Iterator[np.ndarray]:
+    """
+    Yield int16 blocks from an InputStream until closed.
+
+    The stream callback only copies each block onto a queue; detection runs in
+    the consumer's thread.
+    """
+    import sounddevice as sd
+
+    blocks = queue.Queue()
+
+    def callback(indata, frames, time_info, status):
+        if status:
+            logger.debug("Input stream status: %s", status)
+        blocks.put(indata[:, 0].copy())
+
+    with sd.InputStream(samplerate=sample_rate, channels=1, dtype='int16', device=device,
+                        blocksize=blocksize, callback=callback):
+        while True:
+            yield blocks.get()
+
+
+def stream_utterance(sample_rate: int = SAMPLE_RATE, endpointer: Optional[Endpointer] = None,
+                     device=None) -> Iterator[np.ndarray]:
+    """
+    Capture one utterance from the microphone, yielding int16 audio blocks as they are accepted.
+
+    Capture stops as soon as the endpointer ends the utterance.
+
+    Args:
+        sample_rate: Capture rate
+        endpointer: Endpointing state (default: VAD settings from config)
+        device: sounddevice input device (default device if None)
+    """
+    endpointer = endpointer or Endpointer(sample_rate=sample_rate)
+    logger.info("Listening... Speak now.")
+    with closing(_microphone(sample_rate, endpointer.frame_samples, device)) as microphone:
+        for block in microphone:
+            for chunk in endpointer.push(block):
+                yield chunk
+            if endpointer.done:
+                break
+    logger.info("Recording stopped (%s, %.1fs)", endpointer.reason, endpointer.samples / sample_rate)
+
+
+def split_segments(chunks: Iterable[np.ndarray], endpointer: Endpointer,
+                   min_seconds: float = STT_SEGMENT_MIN_SECONDS,
+                   pause_ms: int = STT_SEGMENT_PAUSE_MS, sample_rate: int = SAMPLE_RATE) -> Iterator[np.ndarray]:
+    """
+    Group an utterance's audio into segments that end at natural pauses.
+
+    A segment is closed once it holds at least ``min_seconds`` of audio and
+    the speaker pauses for ``pause_ms``, so it can be transcribed while the
+    rest of the utterance is still being spoken. The last segment is yielded
+    when the utterance ends, unless it is only trailing silence.
+
+    Args:
+        chunks: Audio accepted by ``endpointer`` (e.g. ``stream_utterance(endpointer=...)``)
+        endpointer: The endpointer producing the chunks, consulted for the current pause length
+    """
+    pause_frames = max(1, pause_ms // (1000 * endpointer.frame_samples // sample_rate))
+    min_samples = int(min_seconds * sample_rate)
+    segment, size, voiced = [], 0, False
+    for chunk in chunks:
+        segment.append(chunk)
+        size += len(chunk)
+        voiced = voiced or endpointer.silence_frames == 0
+        if voiced and size >= min_samples and endpointer.silence_frames >= pause_frames and not endpointer.done:
+            yield np.concatenate(segment)
+            segment, size, voiced = [], 0, False
+    if voiced:  # A tail of pure trailing silence is not worth a transcription call
+        yield np.concatenate(segment)
+
+
+def stream_segments(sample_rate: int = SAMPLE_RATE, endpointer: Optional[Endpointer] = None,
+                    device=None) -> Iterator[np.ndarray]:
+    """Capture one utterance, yielding pause-delimited segments while the speaker keeps talking"""
+    endpointer = endpointer or Endpointer(sample_rate=sample_rate)
+    yield from split_segments(stream_utterance(sample_rate, endpointer, device), endpointer,
+                              sample_rate=sample_rate)
+
+
+def record_utterance(sample_rate: int = SAMPLE_RATE, endpointer: Optional[Endpointer] = None) -> np.ndarray:
+    """Record one VAD-endpointed utterance and return it as int16 samples (empty if nobody spoke)"""
+    chunks = list(stream_utterance(sample_rate, endpointer))
+    return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int16)
+
+
+def record_fixed(seconds: Optional[float] = None, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Record a fixed window (RECORD_SECONDS by default) and return it as mono int16 samples"""
+    import sounddevice as sd
+    seconds = seconds or RECORD_SECONDS
+    logger.info("Recording for %s seconds... Speak now.", seconds)
+    recording = sd.rec(int(seconds * sample_rate), samplerate=sample_rate, channels=1, dtype='int16')
+    sd.wait()
+    return recording[:, 0]
+
+
+def record_to_wav(filename, seconds=None, sample_rate=SAMPLE_RATE):
     """
     Record audio from microphone and save as WAV file.
-    
+
     Args:
         filename (str): Path to save the recording
-        seconds (int): Duration of recording
+        seconds (int): Fixed duration; None stops on trailing silence when VAD_ENABLED
+            (RECORD_SECONDS otherwise)
         sample_rate (int): Audio sample rate
-    
+
     Returns:
         str: Path to the saved audio file
     """
-    print(f"🎤 Recording for {seconds} seconds... Speak now.")
-    recording = sd.rec(int(seconds * sample_rate), samplerate=sample_rate, channels=1, dtype='int16')
-    sd.wait()
+    if seconds is None and VAD_ENABLED:
+        recording = record_utterance(sample_rate)
+    else:
+        recording = record_fixed(seconds, sample_rate)
     wavfile.write(filename, sample_rate, recording)
-    print(f"✅ Recording saved to {filename}")
-    return filename
\ No newline at end of file
+    logger.info("Recording saved to %s", filename)
+    return filename
@@ -0,0 +1,231 @@
+"""
+Content-addressed store for synthesized speech.
+
+Audio is keyed by a hash of everything that determines it (text, voice, model,
+speed), so identical answers - every FAQ hit, repeated sentences - are
+synthesized once. Clips live in an in-memory LRU bounded by total bytes and
+are written through to a disk directory (itself bounded) that survives
+restarts and is shared by every worker on the host.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from config import TTS_MODEL, TTS_SPEED, AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_BYTES, AUDIO_CACHE_MAX_DISK_BYTES
+from utils.lazy import Lazy
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class Clip(NamedTuple):
+    key: str  # Content address in the store
+    audio: bytes  # MP3
+
+
+def audio_key(text: str, voice: str, model: str = TTS_MODEL, speed: float = TTS_SPEED) -> str:
+    """
+    Content address of a clip.
+
+    Args:
+        text: Exact text that is spoken
+        voice: Voice identity, e.g. "openai:nova" or "elevenlabs:<voice id>"
+        model: TTS model
+        speed: Playback speed passed to TTS
+
+    Returns:
+        Hex SHA-256 key
+    """
+    identity = json.dumps([text, voice, model, speed], ensure_ascii=False)
+    return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+
+class AudioStore:
+    def __init__(self, max_bytes: int = AUDIO_CACHE_MAX_BYTES, spill_dir: Optional[str] = AUDIO_CACHE_DIR,
+                 max_disk_bytes: int = AUDIO_CACHE_MAX_DISK_BYTES):
+        """
+        Args:
+            max_bytes: Memory budget; least recently used clips are dropped beyond it
+            spill_dir: Directory for the disk tier (None keeps clips in memory only)
+            max_disk_bytes: Disk budget; least recently written clips are deleted beyond it
+        """
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()  # {key: bytes}
+        self._memory_bytes = 0
+        self._disk = OrderedDict()  # {key: size}, oldest first
+        self._disk_bytes = 0
+        self._pinned = set()  # Keys never evicted from disk (pre-rendered FAQ audio)
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        self._scan_disk()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.spill_dir, key[:2], f"{key}.mp3")
+
+    def _scan_disk(self):
+        """Index clips left on disk by earlier runs (or other workers)"""
+        if not self.spill_dir or not os.path.isdir(self.spill_dir):
+            return
+        found = []
+        for root, _, files in os.walk(self.spill_dir):
+            for name in files:
+                if name.endswith(".mp3"):
+                    stat = os.stat(os.path.join(root, name))
+                    found.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(found):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return a clip from memory or disk (promoting it to memory), or None"""
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return audio
+
+        audio = self._read_disk(key)
+        with self._lock:
+            if audio is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, audio)
+            return audio
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if not self.spill_dir:
+            return None
+        try:
+            with open(self._path(key), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, key: str, audio: bytes):
+        """Store a clip in memory and write it through to disk"""
+        if not audio:
+            return
+        with self._lock:
+            self._remember(key, audio)
+            on_disk = key in self._disk
+        if self.spill_dir and not on_disk:
+            self._write_disk(key, audio)
+
+    def _remember(self, key: str, audio: bytes):
+        """Insert into the memory LRU and evict down to the byte budget (lock held)"""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        if len(audio) > self.max_bytes:
+            return  # Larger than the whole budget: disk only
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.evictions += 1
+
+    def _write_disk(self, key: str, audio: bytes):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error("Error writing audio cache: %s", e)
+            return
+
+        with self._lock:
+            if key not in self._disk:
+                self._disk[key] = len(audio)
+                self._disk_bytes += len(audio)
+            expired = []
+            for old_key in list(self._disk):
+                if self._disk_bytes <= self.max_disk_bytes:
+                    break
+                if old_key == key or old_key in self._pinned:
+                    continue
+                self._disk_bytes -= self._disk.pop(old_key)
+                self.disk_evictions += 1
+                expired.append(old_key)
+        for old_key in expired:
+            try:
+                os.unlink(self._path(old_key))
+            except OSError:
+                pass
+
+    def pin(self, keys, load: bool = False):
+        """
+        Exempt clips from disk eviction, optionally loading them into memory.
+
+        Args:
+            keys: Store keys to keep
+            load: Read the clips into the memory tier now (without counting hits)
+        """
+        keys = list(keys)
+        with self._lock:
+            self._pinned.update(keys)
+        if not load:
+            return
+        for key in keys:
+            with self._lock:
+                if key in self._memory:
+                    continue
+            audio = self._read_disk(key)
+            if audio is not None:
+                with self._lock:
+                    self._remember(key, audio)
+
+    def unpin(self, keys):
+        """Make clips evictable again"""
+        with self._lock:
+            self._pinned.difference_update(keys)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            if key in self._memory or key in self._disk:
+                return True
+        return bool(self.spill_dir) and os.path.exists(self._path(key))
+
+    def stats(self) -> dict:
+        """Return tier sizes and hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_items": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "max_bytes": self.max_bytes,
+                "disk_items": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+                "pinned": len(self._pinned),
+                "max_disk_bytes": self.max_disk_bytes,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "disk_evictions": self.disk_evictions,
+            }
+
+
+# Global instance, built on first use
+_audio_store = Lazy(AudioStore, "audio_store")
+
+
+def get_audio_store() -> AudioStore:
+    """Return the shared AudioStore, indexing the disk tier on first call"""
+    return _audio_store.get()
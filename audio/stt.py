@@ -1,39 +1,85 @@
 import os
-from openai import OpenAI
-from config import OPENAI_API_KEY, WHISPER_MODEL, HTTP_TIMEOUT, MAX_RETRIES
+from config import OPENAI_API_KEY, OPENAI_BASE_URL, WHISPER_MODEL, HTTP_TIMEOUT, MAX_RETRIES
+from utils.lazy import Lazy
+from utils.metrics import span
+from utils.log import get_logger
 
-client = OpenAI(
-    api_key=OPENAI_API_KEY,
-    timeout=HTTP_TIMEOUT,
-    max_retries=MAX_RETRIES
-)
+logger = get_logger(__name__)
+
+def _create_client():
+    from openai import OpenAI
+    return OpenAI(
+        api_key=OPENAI_API_KEY,
+        base_url=OPENAI_BASE_URL,
+        timeout=HTTP_TIMEOUT,
+        max_retries=MAX_RETRIES
+    )
+
+_client = Lazy(_create_client, "stt_client")
+
+def get_client():
+    """Return the shared OpenAI transcription client, creating it on first use"""
+    return _client.get()
 
 def transcribe_with_whisper(wav_path):
     """
     Transcribe audio file to text using OpenAI Whisper.
     
+    WAV recordings are compressed in memory first (STT_UPLOAD_FORMAT), other
+    formats are uploaded as they are.
+    
     Args:
         wav_path (str): Path to audio file
     
     Returns:
         str: Transcribed text
     """
-    print("🔄 Transcribing with OpenAI Whisper...")
+    logger.debug("Transcribing with OpenAI Whisper...")
     
     # Validate file path to prevent path traversal
     if not os.path.isfile(wav_path) or '..' in wav_path:
         raise ValueError("Invalid file path")
     
+    if wav_path.lower().endswith(".wav"):
+        from .encode import compress_wav_file  # numpy/scipy load only when a WAV is compressed
+        return transcribe_audio_bytes(*compress_wav_file(wav_path))
+    
     try:
-        with open(wav_path, "rb") as audio_file:
-            transcription = client.audio.transcriptions.create(
+        with open(wav_path, "rb") as audio_file, span("stt"):
+            transcription = get_client().audio.transcriptions.create(
                 model=WHISPER_MODEL,
                 file=audio_file,
                 language="en"  # Specify language for faster processing
             )
         text = transcription.text.strip()
-        print(f"📝 Transcript: {text}")
+        logger.debug("Transcript: %s", text)
+        return text
+    except Exception as e:
+        logger.error("Transcription error: %s", e)
+        raise
+
+def transcribe_audio_bytes(audio_bytes, filename="audio.wav"):
+    """
+    Transcribe in-memory audio to text using OpenAI Whisper (no temp file).
+    
+    Args:
+        audio_bytes (bytes or file-like): Encoded audio (wav, webm, mp3, ...), e.g. an upload's BytesIO
+        filename (str): Name sent with the upload; its extension tells Whisper the format
+    
+    Returns:
+        str: Transcribed text
+    """
+    logger.debug("Transcribing with OpenAI Whisper...")
+    try:
+        with span("stt"):
+            transcription = get_client().audio.transcriptions.create(
+                model=WHISPER_MODEL,
+                file=(filename, audio_bytes),
+                language="en"  # Specify language for faster processing
+            )
+        text = transcription.text.strip()
+        logger.debug("Transcript: %s", text)
         return text
     except Exception as e:
-        print(f"❌ Transcription error: {e}")
-        raise
\ No newline at end of file
+        logger.error("Transcription error: %s", e)
+        raise
@@ -1,54 +1,160 @@
 import asyncio
-import pyttsx3
-from openai import OpenAI
-from config import OPENAI_API_KEY, TTS_MODEL, TTS_VOICE, HTTP_TIMEOUT, MAX_RETRIES, USE_VOICE_CLONE
+import time
+from config import OPENAI_API_KEY, OPENAI_BASE_URL, TTS_MODEL, TTS_VOICE, TTS_SPEED, HTTP_TIMEOUT, MAX_RETRIES, USE_VOICE_CLONE
+from utils.singleflight import SingleFlight
+from utils.lazy import Lazy
+from utils.metrics import AUDIO_STORE_LOOKUPS, TTS_AUDIO_BYTES, TTS_FAILURES, TTS_SECONDS, span
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
 try:
-    from .voice_clone import clone_voice_tts
+    from .voice_clone import clone_voice_bytes
     VOICE_CLONE_AVAILABLE = True
 except ImportError:
     VOICE_CLONE_AVAILABLE = False
 
-client = OpenAI(
-    api_key=OPENAI_API_KEY,
-    timeout=HTTP_TIMEOUT,
-    max_retries=MAX_RETRIES
-)
+def _create_client():
+    from openai import OpenAI
+    return OpenAI(
+        api_key=OPENAI_API_KEY,
+        base_url=OPENAI_BASE_URL,
+        timeout=HTTP_TIMEOUT,
+        max_retries=MAX_RETRIES
+    )
 
-async def tts_with_openai(text, out_path, use_clone=USE_VOICE_CLONE):
+_client = Lazy(_create_client, "tts_client")
+
+def get_client():
+    """Return the shared OpenAI speech client, creating it on first use"""
+    return _client.get()
+
+AUDIO_MEDIA_TYPE = "audio/mpeg"  # Both OpenAI (default format) and ElevenLabs return MP3
+OPENAI_VOICE = f"openai:{TTS_VOICE}"
+
+def preferred_voice(use_clone=USE_VOICE_CLONE):
+    """Identity of the voice synthesize_speech tries first (part of the audio store key)"""
+    if use_clone and VOICE_CLONE_AVAILABLE:
+        from .voice_clone import ELEVENLABS_VOICE_ID
+        return f"elevenlabs:{ELEVENLABS_VOICE_ID or 'default'}"
+    return OPENAI_VOICE
+
+async def synthesize_speech(text, use_clone=USE_VOICE_CLONE):
     """
-    Generate speech from text using OpenAI TTS or voice cloning.
+    Generate speech in memory using OpenAI TTS or voice cloning.
     
     Args:
         text (str): Text to convert to speech
-        out_path (str): Path to save audio file
         use_clone (bool): Use voice cloning if available
     
     Returns:
-        str: Path to saved audio file
+        bytes: MP3 audio
     """
-    if use_clone and VOICE_CLONE_AVAILABLE:
-        print("🔊 Generating TTS with voice cloning...")
+    _, audio = await _synthesize_with_voice(text, use_clone)
+    return audio
+
+async def _synthesize_with_voice(text, use_clone=USE_VOICE_CLONE):
+    """Return (voice identity, MP3 bytes); the voice differs from preferred_voice() after a fallback"""
+    with span("tts"):
+        if use_clone and VOICE_CLONE_AVAILABLE:
+            logger.debug("Generating TTS with voice cloning...")
+            try:
+                audio = await _timed_speech("elevenlabs", clone_voice_bytes, text)
+                logger.debug("Cloned voice TTS generated (%s bytes)", len(audio))
+                return preferred_voice(use_clone), audio
+            except Exception as e:
+                logger.warning("Voice cloning failed: %s, falling back to OpenAI...", e)
+        
+        logger.debug("Generating TTS via OpenAI...")
         try:
-            await asyncio.to_thread(clone_voice_tts, text, out_path)
-            print(f"✅ Cloned voice TTS saved to {out_path}")
-            return out_path
+            audio = await _timed_speech("openai", _openai_speech, text)
+            logger.debug("TTS generated (%s bytes)", len(audio))
+            return OPENAI_VOICE, audio
         except Exception as e:
-            print(f"❌ Voice cloning failed: {e}, falling back to OpenAI...")
-    
-    print("🔊 Generating TTS via OpenAI...")
+            logger.error("OpenAI TTS failed: %s", e)
+            raise
+
+async def _timed_speech(provider, synthesize, text):
+    """Run one blocking provider call in a thread, recording its latency, size or failure"""
+    start = time.perf_counter()
     try:
-        response = client.audio.speech.create(
-            model=TTS_MODEL,
-            voice=TTS_VOICE,
-            input=text[:350],
-            speed=1.2
-        )
-        response.stream_to_file(out_path)
-        print(f"✅ TTS saved to {out_path}")
-        return out_path
-    except Exception as e:
-        print(f"❌ OpenAI TTS failed: {e}")
+        audio = await asyncio.to_thread(synthesize, text)
+    except Exception:
+        TTS_FAILURES.inc(provider=provider)
         raise
+    TTS_SECONDS.observe(time.perf_counter() - start, provider=provider)
+    TTS_AUDIO_BYTES.observe(len(audio), provider=provider)
+    return audio
+
+def _openai_speech(text):
+    # Blocking client call; run in a thread so concurrent syntheses overlap
+    response = get_client().audio.speech.create(
+        model=TTS_MODEL,
+        voice=TTS_VOICE,
+        input=text[:350],
+        speed=TTS_SPEED
+    )
+    return response.content
+
+_synthesis_flights = SingleFlight("tts")
+
+def speech_key(text):
+    """Audio store key under which synthesize_speech_cached looks up text"""
+    from .store import audio_key
+    return audio_key(text[:350], preferred_voice())  # Truncated to what the providers actually speak
+
+async def render_speech(text):
+    """
+    Synthesize text and write it to the audio store, bypassing the lookup.
+    
+    A clip produced by a fallback voice is stored under that voice's key, so
+    it is served now but not mistaken for the preferred voice later.
+    
+    Returns:
+        Clip: content key and MP3 bytes
+    """
+    from .store import Clip, audio_key, get_audio_store
+    
+    text = text[:350]
+    voice, audio = await _synthesize_with_voice(text)
+    key = audio_key(text, voice)
+    await asyncio.to_thread(get_audio_store().put, key, audio)
+    return Clip(key, audio)
+
+async def synthesize_speech_cached(text):
+    """
+    Return speech for text from the audio store, synthesizing it only on a miss.
+    
+    Concurrent requests for the same clip share one synthesis.
+    
+    Returns:
+        Clip: content key and MP3 bytes
+    """
+    from .store import Clip, get_audio_store
+    
+    key = speech_key(text)
+    audio = await asyncio.to_thread(get_audio_store().get, key)
+    AUDIO_STORE_LOOKUPS.inc(result="miss" if audio is None else "hit")
+    if audio is not None:
+        return Clip(key, audio)
+    return await _synthesis_flights.do(key, lambda: render_speech(text))
+
+async def tts_with_openai(text, out_path, use_clone=USE_VOICE_CLONE):
+    """
+    Generate speech from text using OpenAI TTS or voice cloning.
+    
+    Args:
+        text (str): Text to convert to speech
+        out_path (str): Path to save audio file
+        use_clone (bool): Use voice cloning if available
+    
+    Returns:
+        str: Path to saved audio file
+    """
+    audio = await synthesize_speech(text, use_clone)
+    with open(out_path, 'wb') as f:
+        f.write(audio)
+    return out_path
 
 def tts_with_pyttsx3(text, out_path):
     """
@@ -61,8 +167,9 @@ def tts_with_pyttsx3(text, out_path):
     Returns:
         str: Path to saved audio file
     """
-    print("🔊 Generating TTS via pyttsx3...")
+    logger.debug("Generating TTS via pyttsx3...")
     try:
+        import pyttsx3
         engine = pyttsx3.init()
         engine.setProperty('rate', 180)
         engine.setProperty('volume', 0.8)
@@ -73,8 +180,8 @@ def tts_with_pyttsx3(text, out_path):
         
         engine.save_to_file(text, out_path)
         engine.runAndWait()
-        print(f"✅ Pyttsx3 TTS saved to {out_path}")
+        logger.info("Pyttsx3 TTS saved to %s", out_path)
         return out_path
     except Exception as e:
-        print(f"❌ Pyttsx3 TTS failed: {e}")
+        logger.error("Pyttsx3 TTS failed: %s", e)
         raise
\ No newline at end of file
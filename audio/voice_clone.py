@@ -1,18 +1,19 @@
 import os
 import requests
 from typing import Optional
+from config import ELEVENLABS_BASE_URL
 
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
 ELEVENLABS_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID")
 
-def clone_voice_tts(text: str, output_path: str, voice_id: Optional[str] = None) -> str:
-    """Generate TTS using ElevenLabs voice cloning"""
+def clone_voice_bytes(text: str, voice_id: Optional[str] = None) -> bytes:
+    """Generate TTS using ElevenLabs voice cloning and return the MP3 bytes"""
     if not ELEVENLABS_API_KEY:
         raise ValueError("ELEVENLABS_API_KEY not set")
     
     voice_id = voice_id or ELEVENLABS_VOICE_ID or "21m00Tcm4TlvDq8ikWAM"  # Default voice
     
-    url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+    url = f"{ELEVENLABS_BASE_URL}/v1/text-to-speech/{voice_id}"
     headers = {
         "xi-api-key": ELEVENLABS_API_KEY,
         "Content-Type": "application/json"
@@ -28,14 +29,18 @@ def clone_voice_tts(text: str, output_path: str, voice_id: Optional[str] = None)
     
     response = requests.post(url, json=data, headers=headers, timeout=10)
     response.raise_for_status()
-    
+    return response.content
+
+def clone_voice_tts(text: str, output_path: str, voice_id: Optional[str] = None) -> str:
+    """Generate TTS using ElevenLabs voice cloning"""
     # Validate output path to prevent path traversal
     if '..' in output_path or not output_path.endswith(('.mp3', '.wav')):
         raise ValueError("Invalid output path")
     
+    audio = clone_voice_bytes(text, voice_id)
     try:
         with open(output_path, 'wb') as f:
-            f.write(response.content)
+            f.write(audio)
         return output_path
     except Exception as e:
         raise IOError(f"Failed to write audio file: {e}")
@@ -45,7 +50,7 @@ def create_cloned_voice(name: str, audio_files: list) -> str:
     if not ELEVENLABS_API_KEY:
         raise ValueError("ELEVENLABS_API_KEY not set")
     
-    url = "https://api.elevenlabs.io/v1/voices/add"
+    url = f"{ELEVENLABS_BASE_URL}/v1/voices/add"
     headers = {"xi-api-key": ELEVENLABS_API_KEY}
     
     # Validate audio files
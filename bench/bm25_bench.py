@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+BM25 top-k latency on a synthetic Zipf corpus.
+
+Builds ai.bm25.BM25Index over N documents whose words follow a Zipf
+distribution (a few very common terms, a long tail of rare ones), then times
+top-k for multi-term queries drawn from the same distribution and reports
+mean/p50/p95/p99 over queries (each the best of --repeat runs, after a warm-up
+pass that builds every query term's numpy postings). --check compares every
+result with exhaustive BM25 scoring:
+
+    python bench/bm25_bench.py --docs 1000000 --queries 2000 --k 1 10
+    python bench/bm25_bench.py --docs 200000 --check
+
+Defaults (2-5 word queries, 5-15 word documents, Zipf exponent 1.1) measured
+on a single-CPU sandbox:
+
+    docs        k   mean      p50       p95       p99       under 1 ms
+    200,000     1   0.23 ms   0.13 ms   0.82 ms   1.1 ms    98%
+    200,000     10  0.35 ms   0.21 ms   1.0 ms    1.3 ms    95%
+    1,000,000   1   1.8 ms    0.37 ms   9.4 ms    14.7 ms   68%
+    1,000,000   10  2.4 ms    0.63 ms   10.0 ms   15.6 ms   60%
+
+At 1M only the median is sub-millisecond. The slow third are queries made only
+of words found in several percent of the documents or more: no upper bound
+rules documents out, so every document is scored (a few passes over
+per-document arrays).
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ai.bm25 import BM25Index, tokenize  # noqa: E402
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list (None when empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+
+def zipf_words(rng, count, vocab, exponent):
+    """Word indices in [0, vocab) with Zipf frequencies"""
+    ranks = np.arange(1, vocab + 1, dtype=np.float64)
+    weights = ranks ** -exponent
+    return rng.choice(vocab, size=count, p=weights / weights.sum())
+
+
+def make_corpus(rng, docs, vocab, exponent, min_len, max_len):
+    lengths = rng.integers(min_len, max_len + 1, size=docs)
+    words = zipf_words(rng, int(lengths.sum()), vocab, exponent)
+    texts, offset = [], 0
+    for length in lengths.tolist():
+        texts.append(" ".join(f"w{w}" for w in words[offset:offset + length].tolist()))
+        offset += length
+    return texts
+
+
+def exhaustive(index, text, k):
+    """Reference BM25 over every document (normalized like top_k)"""
+    num_docs = len(index)
+    avg_len = index._total_len / num_docs
+    lengths = np.array(index._doc_len, dtype=np.float64)
+    scores = np.zeros(num_docs)
+    total_idf = 0.0
+    for term in set(tokenize(text)):
+        if term not in index._doc_ids:
+            continue
+        ids = np.array(index._doc_ids[term], dtype=np.int64)
+        tfs = np.array(index._tfs[term], dtype=np.float64)
+        idf = np.log(1.0 + (num_docs - len(ids) + 0.5) / (len(ids) + 0.5))
+        total_idf += idf
+        scores[ids] += idf * tfs * (index.k1 + 1.0) / (
+            tfs + index.k1 * (1.0 - index.b + index.b * lengths[ids] / avg_len))
+    if not total_idf:
+        return []
+    top = np.argsort(-scores, kind='stable')[:k]
+    return [(int(doc), min(float(scores[doc]) / total_idf, 1.0)) for doc in top if scores[doc] > 0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BM25 top-k latency on a synthetic Zipf corpus")
+    parser.add_argument("--docs", type=int, default=1_000_000)
+    parser.add_argument("--vocab", type=int, default=200_000)
+    parser.add_argument("--exponent", type=float, default=1.1, help="Zipf exponent of word frequencies")
+    parser.add_argument("--doc-len", type=int, nargs=2, default=(5, 15), metavar=("MIN", "MAX"))
+    parser.add_argument("--query-len", type=int, nargs=2, default=(2, 5), metavar=("MIN", "MAX"))
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--repeat", type=int, default=3, help="runs per query; the fastest is reported")
+    parser.add_argument("--check", action="store_true", help="verify results against exhaustive scoring")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    start = time.perf_counter()
+    texts = make_corpus(rng, args.docs, args.vocab, args.exponent, *args.doc_len)
+    index = BM25Index()
+    index.add(texts)
+    print(f"Indexed {args.docs:,} docs ({len(index._doc_ids):,} terms) in {time.perf_counter() - start:.1f}s")
+
+    query_lengths = rng.integers(args.query_len[0], args.query_len[1] + 1, size=args.queries)
+    words = zipf_words(rng, int(query_lengths.sum()), args.vocab, args.exponent)
+    queries, offset = [], 0
+    for length in query_lengths.tolist():
+        queries.append(" ".join(f"w{w}" for w in words[offset:offset + length].tolist()))
+        offset += length
+
+    start = time.perf_counter()
+    for query in queries:
+        index.top_k(query, 1)  # Per-term numpy postings are built on a term's first query
+    print(f"Warm-up pass over {len(queries):,} queries: {time.perf_counter() - start:.1f}s")
+
+    for k in args.k:
+        timings, mismatches = [], 0
+        for query in queries:
+            best = float("inf")
+            for _ in range(args.repeat):  # Best of n filters out scheduler preemption
+                begin = time.perf_counter()
+                results = index.top_k(query, k)
+                best = min(best, time.perf_counter() - begin)
+            timings.append(best)
+            if args.check:
+                expected = exhaustive(index, query, k)
+                if [round(s, 9) for _, s in results] != [round(s, 9) for _, s in expected]:
+                    mismatches += 1
+        line = (f"k={k:<3} mean {np.mean(timings) * 1000:.3f} ms  p50 {percentile(timings, 50) * 1000:.3f} ms  "
+                f"p95 {percentile(timings, 95) * 1000:.3f} ms  p99 {percentile(timings, 99) * 1000:.3f} ms  "
+                f"under 1 ms {np.mean(np.array(timings) < 0.001):.0%}")
+        if args.check:
+            line += f"  mismatches {mismatches}/{len(queries)}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
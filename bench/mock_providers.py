@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI and ElevenLabs APIs, for offline benchmarking.
+
+Implements the endpoints the assistant calls - streaming chat completions,
+Whisper transcription, OpenAI speech and ElevenLabs text-to-speech - with
+configurable latency, token rate and failure injection. Point the app at it:
+
+    python bench/mock_providers.py --port 8900
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1 ELEVENLABS_BASE_URL=http://127.0.0.1:8900 \\
+        OPENAI_API_KEY2=mock python app.py
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+ANSWER = ("Supercomputing uses thousands of processors working in parallel to solve problems "
+          "that are too large for a single machine. Our club runs workloads on the NVIDIA DGX A100. "
+          "Members learn to train models, profile them and scale them across GPUs. "
+          "Join a workshop to get hands-on time with the system.")
+
+
+class MockSettings:
+    def __init__(self, ttft: float = 0.3, token_rate: float = 60.0, stt_latency: float = 0.4,
+                 stt_per_mb: float = 0.5, tts_latency: float = 0.25, tts_per_char: float = 0.002,
+                 failure_rate: float = 0.0, jitter: float = 0.1, seed: int = None):
+        """
+        Args:
+            ttft: Seconds before the first chat token
+            token_rate: Chat tokens (words) streamed per second
+            stt_latency: Base seconds per transcription
+            stt_per_mb: Extra transcription seconds per MB of audio
+            tts_latency: Base seconds per speech request (OpenAI and ElevenLabs)
+            tts_per_char: Extra speech seconds per input character
+            failure_rate: Fraction of requests answered with HTTP 500
+            jitter: Relative random spread applied to every delay (0.1 = ±10%)
+            seed: Random seed for reproducible runs
+        """
+        self.ttft = ttft
+        self.token_rate = token_rate
+        self.stt_latency = stt_latency
+        self.stt_per_mb = stt_per_mb
+        self.tts_latency = tts_latency
+        self.tts_per_char = tts_per_char
+        self.failure_rate = failure_rate
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.requests = {}  # {endpoint: count}
+        self.failures = 0
+
+    def delay(self, seconds: float) -> float:
+        return max(0.0, seconds * (1 + self.random.uniform(-self.jitter, self.jitter)))
+
+    def should_fail(self) -> bool:
+        return self.random.random() < self.failure_rate
+
+
+def fake_mp3(text: str) -> bytes:
+    """MP3-looking bytes sized like real speech (~1.5KB per 10 characters)"""
+    return b"ID3\x03\x00\x00\x00\x00\x00\x00" + b"\xff\xfb" * max(64, len(text) * 75)
+
+
+def create_app(settings: MockSettings) -> FastAPI:
+    app = FastAPI(title="Mock providers")
+
+    def count(endpoint: str):
+        settings.requests[endpoint] = settings.requests.get(endpoint, 0) + 1
+
+    def failure():
+        settings.failures += 1
+        return JSONResponse(status_code=500, content={"error": {"message": "Injected failure", "type": "server_error"}})
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        count("chat")
+        body = await request.json()
+        if settings.should_fail():
+            return failure()
+        words = ANSWER.split(" ")[:max(1, int(body.get("max_tokens") or 100))]
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = body.get("model", "gpt-4o-mini")
+        created = int(time.time())
+
+        def chunk(delta: dict, finish_reason=None) -> str:
+            payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                       "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            return f"data: {json.dumps(payload)}\n\n"
+
+        if not body.get("stream"):
+            await asyncio.sleep(settings.delay(settings.ttft + len(words) / settings.token_rate))
+            return {"id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": " ".join(words)}}],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": len(words), "total_tokens": len(words)}}
+
+        async def events():
+            await asyncio.sleep(settings.delay(settings.ttft))
+            yield chunk({"role": "assistant", "content": ""})
+            for i, word in enumerate(words):
+                yield chunk({"content": word if i == 0 else " " + word})
+                await asyncio.sleep(settings.delay(1 / settings.token_rate))
+            yield chunk({}, "stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/v1/audio/transcriptions")
+    async def transcriptions(request: Request):
+        count("transcription")
+        size = len(await request.body())
+        await asyncio.sleep(settings.delay(settings.stt_latency + settings.stt_per_mb * size / 1e6))
+        if settings.should_fail():
+            return failure()
+        return {"text": "What is supercomputing?"}
+
+    @app.post("/v1/audio/speech")
+    async def speech(request: Request):
+        count("speech")
+        text = (await request.json()).get("input", "")
+        await asyncio.sleep(settings.delay(settings.tts_latency + settings.tts_per_char * len(text)))
+        if settings.should_fail():
+            return failure()
+        return Response(fake_mp3(text), media_type="audio/mpeg")
+
+    @app.post("/v1/text-to-speech/{voice_id}")
+    async def elevenlabs_speech(voice_id: str, request: Request):
+        count("elevenlabs")
+        text = (await request.json()).get("text", "")
+        await asyncio.sleep(settings.delay(settings.tts_latency + settings.tts_per_char * len(text)))
+        if settings.should_fail():
+            return failure()
+        return Response(fake_mp3(text), media_type="audio/mpeg")
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests": settings.requests, "failures": settings.failures}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI/ElevenLabs server for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--ttft", type=float, default=0.3, help="seconds before the first chat token")
+    parser.add_argument("--token-rate", type=float, default=60.0, help="chat tokens per second")
+    parser.add_argument("--stt-latency", type=float, default=0.4, help="base transcription seconds")
+    parser.add_argument("--tts-latency", type=float, default=0.25, help="base speech seconds")
+    parser.add_argument("--tts-per-char", type=float, default=0.002, help="extra speech seconds per character")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of requests failing with 500")
+    parser.add_argument("--jitter", type=float, default=0.1, help="relative random spread of delays")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    settings = MockSettings(ttft=args.ttft, token_rate=args.token_rate, stt_latency=args.stt_latency,
+                            tts_latency=args.tts_latency, tts_per_char=args.tts_per_char,
+                            failure_rate=args.failure_rate, jitter=args.jitter, seed=args.seed)
+    print(f"🧪 Mock providers on http://{args.host}:{args.port} (OPENAI_BASE_URL=http://{args.host}:{args.port}/v1)")
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
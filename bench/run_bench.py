@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+End-to-end latency benchmark for the web server.
+
+Drives app.py at a fixed concurrency and reports time-to-first-token,
+time-to-first-audio and total latency (p50/p95/p99) per endpoint. With
+--spawn it starts bench/mock_providers.py and app.py itself on free ports,
+with fresh caches, so runs are reproducible offline and need no API keys:
+
+    python bench/run_bench.py --spawn --concurrency 8 --requests 100
+    python bench/run_bench.py --url http://127.0.0.1:5000 --scenarios text_stream
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from urllib.parse import quote
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("text_stream", "ws_text", "ws_voice", "transcribe")
+NOVEL_QUESTIONS = [  # Off-topic on purpose: they miss the FAQs and exercise the LLM path
+    "Recommend a good pasta recipe",
+    "How tall is Mount Everest?",
+    "Which planet has the longest day?",
+    "Translate good morning into French",
+    "How do bees make honey?",
+    "How far away is the moon?",
+]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list (None when empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def silent_wav(seconds: float = 2.0, rate: int = 16000) -> bytes:
+    """A mono 16-bit WAV recording to upload"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(b"\x00\x00" * int(seconds * rate))
+    return buffer.getvalue()
+
+
+def load_questions(faq_ratio: float, unique: bool, count: int, tag: str = ""):
+    """Question stream mixing FAQ hits and novel (LLM) questions, deterministic per run"""
+    with open(os.path.join(ROOT, "faq_database.json"), 'r', encoding='utf-8') as f:
+        faq_questions = list(json.load(f)["faqs"].keys())
+    questions = []
+    for i in range(count):
+        if int((i + 1) * faq_ratio) > int(i * faq_ratio):  # Spreads FAQ hits evenly through the run
+            questions.append(faq_questions[i % len(faq_questions)])
+        else:
+            question = NOVEL_QUESTIONS[i % len(NOVEL_QUESTIONS)]
+            questions.append(f"{question} ({tag} {i})" if unique else question)
+    return questions
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}  # {(scenario, metric): [seconds]}
+        self.errors = {}  # {scenario: count}
+        self.counts = {}  # {scenario: count}
+
+    def add(self, scenario: str, metric: str, seconds: float):
+        self.samples.setdefault((scenario, metric), []).append(seconds)
+
+    def error(self, scenario: str, detail: str):
+        self.errors[scenario] = self.errors.get(scenario, 0) + 1
+        if self.errors[scenario] <= 3:
+            print(f"❌ {scenario}: {detail}")
+
+    def report(self) -> list:
+        rows = []
+        for (scenario, metric), values in sorted(self.samples.items()):
+            rows.append({
+                "scenario": scenario,
+                "metric": metric,
+                "n": len(values),
+                "p50_ms": round(percentile(values, 50) * 1000, 1),
+                "p95_ms": round(percentile(values, 95) * 1000, 1),
+                "p99_ms": round(percentile(values, 99) * 1000, 1),
+                "mean_ms": round(sum(values) / len(values) * 1000, 1),
+            })
+        return rows
+
+
+def stage_means(metrics_text: str) -> dict:
+    """Mean seconds per histogram series from a /metrics scrape, e.g. {'riva_stage_seconds{stage="stt"}': 0.41}"""
+    sums, counts = {}, {}
+    for match in re.finditer(r'^(riva_\w+)_(sum|count)(\{[^}]*\})? (\S+)$', metrics_text, re.M):
+        name, part, labels, value = match.groups()
+        (sums if part == "sum" else counts)[name + (labels or "")] = float(value)
+    return {series: sums[series] / count for series, count in counts.items() if count and series in sums}
+
+
+async def run_text_stream(client: httpx.AsyncClient, question: str, rec: Recorder):
+    """POST /api/text_stream while long-polling the first sentence's audio"""
+    start = time.perf_counter()
+
+    async def first_audio():
+        path = f"/api/get_audio/{quote(question.lower().strip(), safe='')}/0"
+        while time.perf_counter() - start < 60:
+            response = await client.get(path)
+            if response.status_code == 200:
+                rec.add("text_stream", "ttfa", time.perf_counter() - start)
+                return
+            if response.status_code != 202:
+                raise RuntimeError(f"audio status {response.status_code}")
+        raise RuntimeError("audio timed out")
+
+    audio_task = asyncio.create_task(first_audio())
+    try:
+        async with client.stream("POST", "/api/text_stream", json={"text": question}) as response:
+            response.raise_for_status()
+            first = True
+            async for chunk in response.aiter_text():
+                if first and chunk:
+                    rec.add("text_stream", "ttft", time.perf_counter() - start)
+                    first = False
+        rec.add("text_stream", "text_total", time.perf_counter() - start)
+        await audio_task
+    finally:
+        audio_task.cancel()
+
+
+async def run_ws(ws_url: str, scenario: str, question: str, audio: bytes, rec: Recorder):
+    """One /ws/voice session: a typed question (ws_text) or an uploaded utterance (ws_voice)"""
+    import websockets
+
+    async with websockets.connect(ws_url, max_size=None) as ws:
+        start = time.perf_counter()
+        if scenario == "ws_voice":
+            await ws.send(json.dumps({"type": "start", "format": "wav"}))
+            for offset in range(0, len(audio), 16000):
+                await ws.send(audio[offset:offset + 16000])
+            await ws.send(json.dumps({"type": "end"}))
+        else:
+            await ws.send(json.dumps({"type": "text", "text": question}))
+
+        seen = set()
+        while True:
+            message = await asyncio.wait_for(ws.recv(), timeout=60)
+            elapsed = time.perf_counter() - start
+            if isinstance(message, bytes):
+                if "audio" not in seen:
+                    seen.add("audio")
+                    rec.add(scenario, "ttfa", elapsed)
+                continue
+            kind = json.loads(message).get("type")
+            if kind == "error":
+                raise RuntimeError(json.loads(message).get("detail"))
+            if kind == "transcript" and kind not in seen:
+                seen.add(kind)
+                rec.add(scenario, "transcript", elapsed)
+            elif kind == "text" and kind not in seen:
+                seen.add(kind)
+                rec.add(scenario, "ttft", elapsed)
+            elif kind == "done":
+                rec.add(scenario, "total", elapsed)
+                return
+
+
+async def run_transcribe(client: httpx.AsyncClient, audio: bytes, rec: Recorder):
+    """POST a raw WAV body to /api/transcribe"""
+    start = time.perf_counter()
+    response = await client.post("/api/transcribe", content=audio, headers={"Content-Type": "audio/wav"})
+    response.raise_for_status()
+    rec.add("transcribe", "total", time.perf_counter() - start)
+
+
+async def run_scenario(base_url: str, scenario: str, questions: list, concurrency: int, rec: Recorder):
+    audio = silent_wav()
+    ws_url = base_url.replace("http", "ws", 1) + "/ws/voice"
+    queue = asyncio.Queue()
+    for question in questions:
+        queue.put_nowait(question)
+
+    async def worker(client):
+        while not queue.empty():
+            question = queue.get_nowait()
+            rec.counts[scenario] = rec.counts.get(scenario, 0) + 1
+            try:
+                if scenario == "text_stream":
+                    await run_text_stream(client, question, rec)
+                elif scenario == "transcribe":
+                    await run_transcribe(client, audio, rec)
+                else:
+                    await run_ws(ws_url, scenario, question, audio, rec)
+            except Exception as e:
+                rec.error(scenario, f"{type(e).__name__}: {e}")
+
+    limits = httpx.Limits(max_connections=concurrency * 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    print(f"✅ {scenario}: {len(questions)} requests in {elapsed:.1f}s ({len(questions) / elapsed:.1f} req/s)")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_ready(url: str, path: str, timeout: float = 60):
+    async with httpx.AsyncClient(timeout=2) as client:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url + path)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+
+def spawn(args, workdir: str):
+    """Start the mock providers and the app; returns (app url, processes)"""
+    mock_port, app_port = free_port(), free_port()
+    mock_url = f"http://127.0.0.1:{mock_port}"
+    mock_args = [sys.executable, os.path.join(ROOT, "bench", "mock_providers.py"), "--port", str(mock_port),
+                 "--ttft", str(args.ttft), "--token-rate", str(args.token_rate),
+                 "--tts-latency", str(args.tts_latency), "--failure-rate", str(args.failure_rate), "--seed", "1"]
+    env = dict(os.environ,
+               OPENAI_API_KEY2="mock", OPENAI_BASE_URL=f"{mock_url}/v1",
+               ELEVENLABS_API_KEY="mock", ELEVENLABS_BASE_URL=mock_url,
+               WEB_WORKERS=str(args.workers))
+    if not args.keep_caches:
+        env.update(AUDIO_CACHE_DIR=os.path.join(workdir, "audio"),
+                   ANSWER_CACHE_FILE=os.path.join(workdir, "answer_cache.json"))
+    app_args = [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(app_port),
+                "--workers", str(args.workers), "--log-level", "warning"]
+    processes = [subprocess.Popen(mock_args), subprocess.Popen(app_args, cwd=ROOT, env=env)]
+    return mock_url, f"http://127.0.0.1:{app_port}", processes
+
+
+async def main_async(args):
+    rec = Recorder()
+    processes = []
+    workdir = tempfile.mkdtemp(prefix="ai-host-bench-")
+    try:
+        base_url = args.url.rstrip("/")
+        mock_url = None
+        if args.spawn:
+            mock_url, base_url, processes = spawn(args, workdir)
+            await wait_ready(mock_url, "/stats")
+            await wait_ready(base_url, "/api/ready")
+        print(f"🔄 Benchmarking {base_url} (concurrency {args.concurrency}, {args.requests} requests per scenario)")
+
+        for scenario in args.scenarios:
+            questions = load_questions(args.faq_ratio, args.unique, args.requests, scenario)
+            await run_scenario(base_url, scenario, questions, args.concurrency, rec)
+
+        rows = rec.report()
+        print(f"\n{'scenario':<12} {'metric':<11} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'mean ms':>9}")
+        for row in rows:
+            print(f"{row['scenario']:<12} {row['metric']:<11} {row['n']:>5} {row['p50_ms']:>9} "
+                  f"{row['p95_ms']:>9} {row['p99_ms']:>9} {row['mean_ms']:>9}")
+        for scenario in args.scenarios:
+            if rec.errors.get(scenario):
+                print(f"⚠️ {scenario}: {rec.errors[scenario]}/{rec.counts.get(scenario, 0)} requests failed")
+
+        async with httpx.AsyncClient() as client:
+            response = await client.get(base_url + "/metrics")
+        if response.status_code == 200:
+            print("\nServer-side means (one worker's /metrics):")
+            for series, mean in sorted(stage_means(response.text).items()):
+                if not series.startswith(("riva_tts_audio_bytes", "riva_llm_tokens_per_second")):
+                    print(f"  {series:<48} {mean * 1000:>9.1f} ms")
+
+        if mock_url:
+            async with httpx.AsyncClient() as client:
+                print(f"🧪 Upstream calls: {(await client.get(mock_url + '/stats')).json()['requests']}")
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump({"config": vars(args), "results": rows, "errors": rec.errors}, f, indent=2)
+            print(f"✅ Results written to {args.json}")
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end latency benchmark for the Riva web server")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="running app to benchmark")
+    parser.add_argument("--spawn", action="store_true", help="start mock providers and the app on free ports")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=40, help="requests per scenario")
+    parser.add_argument("--faq-ratio", type=float, default=0.5, help="fraction of questions that hit the FAQs")
+    parser.add_argument("--unique", action="store_true", help="make novel questions unique (defeats answer caches)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers when spawning")
+    parser.add_argument("--keep-caches", action="store_true", help="spawned app uses the repo's audio/answer caches")
+    parser.add_argument("--ttft", type=float, default=0.3, help="mock seconds before the first chat token")
+    parser.add_argument("--token-rate", type=float, default=60.0, help="mock chat tokens per second")
+    parser.add_argument("--tts-latency", type=float, default=0.25, help="mock base speech seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="mock fraction of failing upstream calls")
+    parser.add_argument("--json", help="write results to this file")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+"""Build the persisted FAQ and knowledge passage indexes so servers start without refitting TF-IDF"""
+import sys
+from ai.knowledge import EnhancedRAG
+from ai.passages import PassageIndex
+
+def main():
+    """Fit the FAQ vectorizer once and write the memory-mappable artifact"""
+    faq_file = sys.argv[1] if len(sys.argv) > 1 else "faq_database.json"
+    
+    print(f"🔄 Building FAQ index from {faq_file}...")
+    rag = EnhancedRAG(faq_file=faq_file)
+    index_dir = rag.build_index()
+    print(f"✅ Indexed {rag.get_faq_count()} FAQs into {index_dir}/")
+    
+    passages = PassageIndex()
+    print(f"✅ Passage index ready in {passages.index_dir}/")
+
+if __name__ == "__main__":
+    main()
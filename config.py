@@ -5,19 +5,47 @@ load_dotenv()
 
 # Audio Configuration
 SAMPLE_RATE = 16000
-RECORD_SECONDS = 3  # Reduced to 3 seconds for faster response
+RECORD_SECONDS = 3  # Fixed recording window when VAD is disabled
+VAD_ENABLED = os.getenv("VAD_ENABLED", "true").lower() == "true"  # Stop recording when the speaker stops
+VAD_FRAME_MS = 30  # Analysis frame (10, 20 or 30 ms also suits webrtcvad)
+VAD_MIN_SPEECH_MS = 90  # Consecutive speech needed to start an utterance
+VAD_TRAILING_SILENCE_MS = int(os.getenv("VAD_TRAILING_SILENCE_MS", "700"))  # Silence that ends an utterance
+VAD_PRE_ROLL_MS = 300  # Audio kept from before speech onset, so first syllables are not clipped
+VAD_MAX_SECONDS = float(os.getenv("VAD_MAX_SECONDS", "15"))  # Hard cap on one utterance
+VAD_START_TIMEOUT = 8  # Seconds to wait for speech before giving up
+VAD_ENERGY_MARGIN_DB = 10  # Speech must be this far above the tracked noise floor
+STT_SEGMENT_MIN_SECONDS = 2.0  # Speech before a pause is sent for transcription while recording continues
+STT_SEGMENT_PAUSE_MS = 300  # Pause length that may close a segment (shorter than VAD_TRAILING_SILENCE_MS)
+STT_UPLOAD_FORMAT = os.getenv("STT_UPLOAD_FORMAT", "opus").lower()  # opus | flac | wav (needs soundfile for opus/flac)
 
 # OpenAI Configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY2")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None  # e.g. http://127.0.0.1:8900/v1 for bench/mock_providers.py
 OPENAI_MODEL_CHAT = "gpt-4o-mini"  # Faster model
 ASSISTANT_NAME = "Riva"
 WHISPER_MODEL = "whisper-1"
 TTS_MODEL = "tts-1"  # Faster model (not HD)
 TTS_VOICE = "nova"  # Faster voice
+TTS_SPEED = 1.2  # 20% faster playback
+TTS_SEGMENT_CONCURRENCY = 3  # Sentences synthesized in parallel while the LLM streams
+TTS_MIN_SEGMENT_CHARS = 20  # Shorter sentences are merged with the next one
+TTS_MAX_SEGMENT_CHARS = 300  # Longer runs are cut at a word boundary (TTS input is capped at 350)
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", os.path.join("cache", "audio"))  # Disk tier of the TTS audio store
+AUDIO_CACHE_MAX_BYTES = int(os.getenv("AUDIO_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))  # In-memory LRU budget
+AUDIO_CACHE_MAX_DISK_BYTES = int(os.getenv("AUDIO_CACHE_MAX_DISK_BYTES", str(1024 * 1024 * 1024)))
+FAQ_AUDIO_MANIFEST = os.getenv("FAQ_AUDIO_MANIFEST", os.path.join(AUDIO_CACHE_DIR, "faq_manifest.json"))  # Pre-rendered FAQ clips (prerender_faq_audio.py)
+FAQ_PRERENDER_CONCURRENCY = 4  # Parallel TTS calls while pre-rendering FAQ answers
+FAQ_PRERENDER_ON_ADD = os.getenv("FAQ_PRERENDER_ON_ADD", "true").lower() == "true"  # Render audio for answers added at runtime
 
 # Voice Cloning Configuration
 USE_VOICE_CLONE = os.getenv("USE_VOICE_CLONE", "false").lower() == "true"
 VOICE_CLONE_SAMPLE = os.getenv("VOICE_CLONE_SAMPLE", "voice_sample.wav")  # Path to voice sample
+ELEVENLABS_BASE_URL = os.getenv("ELEVENLABS_BASE_URL", "https://api.elevenlabs.io").rstrip("/")
+
+# Logging Configuration (utils/log.py)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # "text" or "json" (one object per line)
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0"))  # Fraction of requests whose DEBUG lines are kept
 
 # Performance Configuration
 MAX_TOKENS = 100  # Reduced to 100 for faster generation
@@ -26,6 +54,34 @@ HTTP_TIMEOUT = 8  # Reduced timeout
 MAX_RETRIES = 1  # Single retry only
 STREAM_RESPONSE = False  # Disable streaming for web
 
+# Index Configuration (build with build_faq_index.py)
+FAQ_ENGINE = os.getenv("FAQ_ENGINE", "tfidf")  # "tfidf", "bm25" (inverted index, no vocabulary cap) or "hashing" (stateless)
+INDEX_DIR = os.getenv("INDEX_DIR", "index")  # Root for persisted TF-IDF indexes
+FAQ_INDEX_DIR = os.getenv("FAQ_INDEX_DIR", os.path.join(INDEX_DIR, "faq"))
+FAQ_JOURNAL_COMPACT_MIN = 200  # Journaled FAQs before background compaction is considered
+FAQ_JOURNAL_COMPACT_RATIO = 0.5  # ...and journal size relative to the snapshot (keeps bulk loads linear)
+FAQ_COMPACT_MIN_INTERVAL = 60  # Seconds between compactions started early to persist a vocabulary refit
+FAQ_CACHE_SIZE = int(os.getenv("FAQ_CACHE_SIZE", "1024"))  # Max cached query results (LRU)
+FAQ_CACHE_TTL = float(os.getenv("FAQ_CACHE_TTL", "3600"))  # Seconds before a cached result expires
+FAQ_SHARED_INDEX = os.getenv("FAQ_SHARED_INDEX", "false").lower() == "true"  # Attach read-only to a prebuilt index (set for web workers)
+
+# Web Server Configuration
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", "1"))  # >1 shares one memory-mapped FAQ index across uvicorn workers
+
+# Knowledge Passage Retrieval (grounds LLM fallbacks)
+KNOWLEDGE_FILE = "knowledge/knowledge.md"
+PASSAGE_INDEX_DIR = os.path.join(INDEX_DIR, "passages")
+PASSAGE_TOP_K = 3  # Passages injected per fallback question
+PASSAGE_MAX_CHARS = 1500  # Context budget keeps input tokens (and TTFT) low
+PASSAGE_MIN_SCORE = 0.05  # Ignore barely related passages
+
+# LLM Answer Cache (reworded repeats of fallback questions skip the LLM)
+ANSWER_CACHE_FILE = os.getenv("ANSWER_CACHE_FILE", os.path.join(INDEX_DIR, "answer_cache.json"))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))  # Max cached answers (LRU)
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "86400"))  # Seconds before a cached answer expires
+ANSWER_CACHE_THRESHOLD = 0.85  # Cosine similarity (hashed word/char n-grams) for a reworded question to reuse an answer
+ANSWER_CACHE_MIN_OVERLAP = 0.75  # ...and the share of content words both questions must have in common
+
 # System Prompt
 SYSTEM_PROMPT = """
 You are Riva, the AI voice assistant for the NextGen Supercomputing Club.
@@ -1,30 +1,81 @@
 import { useState, useRef } from 'react'
-import axios from 'axios'
 import './styles/App.css'
 
 function App() {
   const [isRecording, setIsRecording] = useState(false)
   const [isProcessing, setIsProcessing] = useState(false)
   const mediaRecorderRef = useRef(null)
-  const audioChunksRef = useRef([])
+  const socketRef = useRef(null)
+  const playbackRef = useRef(Promise.resolve())
+  const pendingAudioRef = useRef(null)
+
+  // One WebSocket carries the whole interaction: audio frames up; transcript,
+  // text chunks and sentence audio down as soon as each is ready
+  const getSocket = () => new Promise((resolve, reject) => {
+    const current = socketRef.current
+    if (current && current.readyState === WebSocket.OPEN) return resolve(current)
+
+    const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws'
+    const socket = new WebSocket(`${protocol}://${window.location.host}/ws/voice`)
+    socket.binaryType = 'blob'
+    socket.onmessage = handleServerMessage
+    socket.onopen = () => resolve(socket)
+    socket.onerror = (error) => {
+      setIsProcessing(false)
+      reject(error)
+    }
+    socket.onclose = () => {
+      if (socketRef.current === socket) socketRef.current = null
+      // Dropped mid-answer (server restart, error): no "done" will arrive
+      setIsProcessing(false)
+    }
+    socketRef.current = socket
+  })
+
+  const handleServerMessage = (event) => {
+    if (typeof event.data !== 'string') {
+      // Binary frame: the audio announced by the preceding header
+      if (pendingAudioRef.current) {
+        const audio = new Audio(URL.createObjectURL(new Blob([event.data], { type: 'audio/mpeg' })))
+        playbackRef.current = playbackRef.current.then(() => playAudio(audio))
+        pendingAudioRef.current = null
+      }
+      return
+    }
+
+    const message = JSON.parse(event.data)
+    if (message.type === 'audio') {
+      pendingAudioRef.current = message
+    } else if (message.type === 'done') {
+      setIsProcessing(false)
+    } else if (message.type === 'error') {
+      console.error('Voice session error:', message.detail)
+      setIsProcessing(false)
+    }
+  }
 
   const startRecording = async () => {
     try {
       const stream = await navigator.mediaDevices.getUserMedia({ audio: true })
-      mediaRecorderRef.current = new MediaRecorder(stream)
-      audioChunksRef.current = []
+      const socket = await getSocket()
+      // Opus at speech bitrate keeps uploads small on slow networks
+      const opus = 'audio/webm;codecs=opus'
+      mediaRecorderRef.current = MediaRecorder.isTypeSupported(opus)
+        ? new MediaRecorder(stream, { mimeType: opus, audioBitsPerSecond: 24000 })
+        : new MediaRecorder(stream)
+      socket.send(JSON.stringify({ type: 'start', format: 'webm' }))
 
+      // Frames go up while the user is still speaking
       mediaRecorderRef.current.ondataavailable = (e) => {
-        audioChunksRef.current.push(e.data)
+        if (e.data.size > 0) socket.send(e.data)
       }
 
-      mediaRecorderRef.current.onstop = async () => {
-        const audioBlob = new Blob(audioChunksRef.current, { type: 'audio/wav' })
-        await handleAudioMessage(audioBlob)
+      mediaRecorderRef.current.onstop = () => {
+        socket.send(JSON.stringify({ type: 'end' }))
         stream.getTracks().forEach(track => track.stop())
       }
 
-      mediaRecorderRef.current.start()
+      mediaRecorderRef.current.start(250)
       setIsRecording(true)
     } catch (error) {
       console.error('Microphone error:', error)
@@ -39,64 +90,18 @@ function App() {
     }
   }
 
-  const handleAudioMessage = async (audioBlob) => {
-    try {
-      const reader = new FileReader()
-      reader.readAsDataURL(audioBlob)
-      reader.onloadend = async () => {
-        const base64Audio = reader.result
-        const response = await axios.post('/api/transcribe', { audio: base64Audio })
-        
-        if (response.data.transcript) {
-          await handleTextMessage(response.data.transcript)
-        }
-        setIsProcessing(false)
-      }
-    } catch (error) {
-      setIsProcessing(false)
-      console.error('Transcription error:', error)
+  const playAudio = (audio) => new Promise(resolve => {
+    const done = () => {
+      URL.revokeObjectURL(audio.src)
+      resolve()
     }
-  }
-
-  const handleTextMessage = async (text) => {
-    try {
-      const response = await fetch('/api/text_stream', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ text })
-      })
-
-      const reader = response.body.getReader()
-      const decoder = new TextDecoder()
-
-      while (true) {
-        const { value, done } = await reader.read()
-        if (done) break
-        decoder.decode(value)
-      }
-
-      fetchAudio(text.toLowerCase().trim())
-    } catch (error) {
-      console.error('Error:', error)
-    }
-  }
-
-  const fetchAudio = async (cacheKey, retries = 10) => {
-    if (retries <= 0) return
-
-    try {
-      const response = await axios.get(`/api/get_audio/${encodeURIComponent(cacheKey)}`)
-      
-      if (response.data.status === 'ready' && response.data.audio !== 'error') {
-        const audio = new Audio(response.data.audio)
-        audio.play().catch(e => console.error('Audio playback failed:', e))
-      } else if (response.data.status === 'processing') {
-        setTimeout(() => fetchAudio(cacheKey, retries - 1), 2000)
-      }
-    } catch (error) {
-      console.error('Audio fetch error:', error)
-    }
-  }
+    audio.onended = done
+    audio.onerror = done
+    audio.play().catch(e => {
+      console.error('Audio playback failed:', e)
+      done()
+    })
+  })
 
   return (
     <div className="app">
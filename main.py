@@ -1,49 +1,61 @@
-import os
 import asyncio
-import tempfile
 import time
 from concurrent.futures import ThreadPoolExecutor
-from config import OPENAI_API_KEY, RECORD_SECONDS
-from audio.recorder import record_to_wav
-from audio.stt import transcribe_with_whisper
+from config import OPENAI_API_KEY, VAD_ENABLED
+from audio.encode import encode_audio
+from audio.recorder import record_fixed, stream_segments
+from audio.stt import transcribe_audio_bytes
 from audio.tts import tts_with_pyttsx3  # ✅ fast local TTS for low latency
 from ai.chat import ask_chatgpt_stream, get_faq_stats  # ✅ streaming chat
 from utils.audio_player import check_audio_dependencies
+from utils.log import get_logger
 
+logger = get_logger(__name__)
 
-async def process_interaction():
-    """Process one full interaction cycle with real-time low-latency streaming"""
-    # Record user voice
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmpwav:
-        wav_path = tmpwav.name
 
-    record_to_wav(wav_path, seconds=RECORD_SECONDS)
+def record_and_transcribe(executor: ThreadPoolExecutor) -> str:
+    """
+    Record one question and transcribe it while the user is still speaking.
+
+    Each pause-delimited segment is compressed in memory (STT_UPLOAD_FORMAT)
+    and sent to Whisper as soon as it is complete, so once the speaker stops
+    only the last segment is left to transcribe.
+
+    Args:
+        executor: Pool running the transcription calls
+
+    Returns:
+        str: The transcript, segments joined in order
+    """
+    if not VAD_ENABLED:
+        return transcribe_audio_bytes(*encode_audio(record_fixed()))
 
-    # Use thread pool for CPU-bound tasks
+    futures = [executor.submit(transcribe_audio_bytes, *encode_audio(segment))
+               for segment in stream_segments()]
+    speech_end = time.perf_counter()
+    text = " ".join(part for part in (f.result() for f in futures) if part)
+    if futures:
+        logger.info("Transcript ready %.2fs after speech ended (%d segment(s))",
+                    time.perf_counter() - speech_end, len(futures))
+    return text
+
+
+async def process_interaction():
+    """Process one full interaction cycle with real-time low-latency streaming"""
+    # Record and transcribe the user's voice, overlapped segment by segment
     with ThreadPoolExecutor(max_workers=2) as executor:
-        # Speech to text (Whisper)
         try:
-            user_text = await asyncio.get_event_loop().run_in_executor(
-                executor, transcribe_with_whisper, wav_path
-            )
+            user_text = await asyncio.to_thread(record_and_transcribe, executor)
         except Exception as e:
             print(f"❌ Transcription failed: {e}")
-            try:
-                os.unlink(wav_path)
-            except OSError:
-                pass
             return None
 
         if not user_text:
             print("❌ No speech detected.")
-            os.unlink(wav_path)
             return None
 
         print(f"\n🎯 User question: '{user_text}'")
 
-    # Delete temp audio asynchronously
-    cleanup_task = asyncio.create_task(asyncio.to_thread(os.unlink, wav_path))
-
     # --- STREAMING RESPONSE PHASE ---
     print("\n🧠 Streaming AI response (real-time, low latency)...\n")
     response_chunks = []
@@ -70,7 +82,6 @@ async def process_interaction():
     except Exception as e:
         print(f"\n❌ Streaming error: {e}")
 
-    await cleanup_task
     return "".join(response_chunks)
 
 
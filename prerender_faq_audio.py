@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""Render speech for every FAQ answer into the audio store so FAQ hits need no TTS call"""
+import sys
+from ai.knowledge import EnhancedRAG
+from audio.prerender import prerender_faq_audio
+from config import FAQ_AUDIO_MANIFEST, FAQ_PRERENDER_CONCURRENCY
+
+def main():
+    """Render missing FAQ answer clips with bounded parallelism and rewrite the manifest"""
+    faq_file = sys.argv[1] if len(sys.argv) > 1 else "faq_database.json"
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else FAQ_PRERENDER_CONCURRENCY
+    
+    rag = EnhancedRAG(faq_file=faq_file)
+    print(f"🔄 Pre-rendering audio for {rag.get_faq_count()} FAQs ({concurrency} at a time)...")
+    stats = prerender_faq_audio(rag.faqs, concurrency)
+    print(f"✅ {stats['answers']} answers: {stats['rendered']} clips rendered, "
+          f"{stats['cached']} already cached, {stats['failed']} failed")
+    print(f"✅ Manifest written to {FAQ_AUDIO_MANIFEST}")
+    if stats["failed"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
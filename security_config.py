@@ -2,9 +2,18 @@
 import os
 
 # File validation settings
-ALLOWED_AUDIO_EXTENSIONS = {'.wav', '.mp3', '.m4a', '.ogg'}
+ALLOWED_AUDIO_EXTENSIONS = {'.wav', '.flac', '.mp3', '.m4a', '.ogg', '.webm'}  # webm: browser MediaRecorder; ogg: Opus
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
 MAX_TEXT_LENGTH = 1000
+MAX_BATCH_QUESTIONS = 10000  # Per /api/faq/batch request
+
+# Browser origins allowed to call the API (CORS) and to open /ws/voice: the app itself and the
+# Vite dev server (start_dev.sh), whose proxy forwards the browser's Origin unchanged.
+# Comma-separated ALLOWED_ORIGINS replaces the list, e.g. for a public hostname
+DEFAULT_ALLOWED_ORIGINS = ("http://localhost:5000", "http://127.0.0.1:5000",
+                           "http://localhost:3000", "http://127.0.0.1:3000")
+ALLOWED_ORIGINS = [origin.strip() for origin in os.getenv("ALLOWED_ORIGINS", ",".join(DEFAULT_ALLOWED_ORIGINS)).split(",")
+                   if origin.strip()]
 
 # Path validation
 def validate_file_path(path: str) -> bool:
@@ -21,4 +30,13 @@ def sanitize_text_input(text: str) -> str:
     """Sanitize text input"""
     if not isinstance(text, str):
         return ""
-    return text.strip()[:MAX_TEXT_LENGTH]
\ No newline at end of file
+    return text.strip()[:MAX_TEXT_LENGTH]
+
+def validate_origin(origin) -> bool:
+    """
+    Check a WebSocket handshake's Origin against ALLOWED_ORIGINS.
+
+    CORS does not apply to WebSockets, so any page could otherwise open one.
+    Clients that send no Origin (not browsers, so not driven by a web page) are allowed.
+    """
+    return origin is None or origin in ALLOWED_ORIGINS
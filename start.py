@@ -33,12 +33,19 @@ def main():
     
     try:
         import uvicorn
+        from config import WEB_WORKERS
+        if WEB_WORKERS > 1:
+            from ai.knowledge import prepare_shared_index
+            if prepare_shared_index():
+                # Workers map one prebuilt index instead of each building their own
+                os.environ["FAQ_SHARED_INDEX"] = "true"
+                print(f"🧠 Sharing FAQ index across {WEB_WORKERS} workers")
         uvicorn.run(
             "app:app",
             host="127.0.0.1",
             port=5000,
             reload=False,
-            workers=1,
+            workers=WEB_WORKERS,
             access_log=False
         )
     except KeyboardInterrupt:
@@ -0,0 +1,57 @@
+import time
+
+from ai.answer_cache import AnswerCache
+
+
+def make_cache(**kwargs):
+    return AnswerCache(path=None, **kwargs)
+
+
+def test_exact_repeat_hits():
+    cache = make_cache()
+    cache.put("What is supercomputing?", "Big computers.")
+    assert cache.get("what is  supercomputing") == "Big computers."
+    assert cache.hits == 1
+
+
+def test_rewording_hits():
+    cache = make_cache()
+    cache.put("How do I join the club?", "Sign up at the desk.")
+    assert cache.get("How can I join the club?") == "Sign up at the desk."
+    assert cache.similar_hits == 1
+
+
+def test_shared_topic_word_does_not_hit():
+    # Regression: both questions used to reduce to "club" in the FAQ vocabulary (cosine 1.0)
+    cache = make_cache()
+    cache.put("What is the club's plan for the robotics fest?", "A robot race.")
+    assert cache.get("What is the club's budget for pizza?") is None
+    assert cache.misses == 1
+
+
+def test_overlap_gate_rejects_similar_wording():
+    cache = make_cache(threshold=0.0)
+    cache.put("what time does the event start", "6pm")
+    assert cache.get("what time does the event end") is None
+
+
+def test_context_must_match():
+    cache = make_cache()
+    cache.put("How do I join the club?", "Sign up at the desk.", context="a")
+    assert cache.get("How do I join the club?", context="b") is None
+    assert cache.get("How can I join the club?", context="b") is None
+
+
+def test_lru_eviction_and_ttl():
+    cache = make_cache(max_size=2)
+    cache.put("first question here", "1")
+    cache.put("second question here", "2")
+    cache.get("first question here")
+    cache.put("third question here", "3")
+    assert cache.get("second question here") is None
+    assert cache.evictions == 1
+
+    expiring = make_cache(ttl=0.0001)
+    expiring.put("what is supercomputing", "x")
+    time.sleep(0.01)
+    assert expiring.get("what is supercomputing") is None
@@ -0,0 +1,73 @@
+from audio.store import AudioStore, audio_key
+
+
+def make_store(tmp_path, max_bytes=1000, max_disk_bytes=1000):
+    return AudioStore(max_bytes=max_bytes, spill_dir=str(tmp_path / "audio"), max_disk_bytes=max_disk_bytes)
+
+
+def test_key_covers_every_input():
+    key = audio_key("Hello", "openai:nova", "tts-1", 1.0)
+    assert key == audio_key("Hello", "openai:nova", "tts-1", 1.0)
+    assert key != audio_key("Hello!", "openai:nova", "tts-1", 1.0)
+    assert key != audio_key("Hello", "openai:alloy", "tts-1", 1.0)
+    assert key != audio_key("Hello", "openai:nova", "tts-1-hd", 1.0)
+    assert key != audio_key("Hello", "openai:nova", "tts-1", 1.25)
+
+
+def test_memory_lru_evicts_least_recently_used(tmp_path):
+    store = AudioStore(max_bytes=250, spill_dir=None)
+    store.put("a", b"a" * 100)
+    store.put("b", b"b" * 100)
+    store.get("a")  # b is now the least recently used
+    store.put("c", b"c" * 100)
+    assert store.get("b") is None
+    assert store.get("a") == b"a" * 100
+    assert store.get("c") == b"c" * 100
+    stats = store.stats()
+    assert stats["evictions"] == 1 and stats["memory_bytes"] == 200
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    make_store(tmp_path).put("a", b"mp3 bytes")
+    store = make_store(tmp_path)
+    assert "a" in store
+    assert store.get("a") == b"mp3 bytes"
+    assert store.stats()["disk_hits"] == 1
+    assert store.get("a") == b"mp3 bytes"
+    assert store.stats()["memory_hits"] == 1
+
+
+def test_disk_evicts_oldest_clip_but_not_the_one_written(tmp_path):
+    store = make_store(tmp_path, max_bytes=10, max_disk_bytes=250)
+    for key in "abc":
+        store.put(key, key.encode() * 100)
+    assert "a" not in store
+    assert store.get("b") == b"b" * 100 and store.get("c") == b"c" * 100
+    assert store.stats()["disk_evictions"] == 1
+
+    store.put("big", b"x" * 500)  # Over the whole budget: everything else goes, it stays
+    assert "big" in store and "b" not in store and "c" not in store
+
+
+def test_pinned_clips_survive_disk_eviction(tmp_path):
+    store = make_store(tmp_path, max_bytes=10, max_disk_bytes=250)
+    store.put("faq", b"f" * 100)
+    store.pin(["faq"])
+    for key in "abcd":
+        store.put(key, key.encode() * 100)
+    assert "faq" in store
+    assert store.stats()["pinned"] == 1
+
+    store.unpin(["faq"])
+    store.put("e", b"e" * 100)
+    assert "faq" not in store
+
+
+def test_pin_with_load_fills_memory_without_counting_hits(tmp_path):
+    make_store(tmp_path).put("faq", b"f" * 100)
+    store = make_store(tmp_path)
+    store.pin(["faq", "missing"], load=True)
+    stats = store.stats()
+    assert stats["memory_items"] == 1 and stats["disk_hits"] == 0 and stats["misses"] == 0
+    assert store.get("faq") == b"f" * 100
+    assert store.stats()["memory_hits"] == 1
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from ai import bm25
+from ai.bm25 import BM25Index, tokenize
+
+
+def make_texts(rng, count, vocab=200):
+    weights = np.arange(1, vocab + 1, dtype=np.float64) ** -1.1
+    return [" ".join(f"w{w}" for w in rng.choice(vocab, size=rng.integers(3, 12), p=weights / weights.sum()))
+            for _ in range(count)]
+
+
+def exhaustive(index, text, k):
+    """BM25 over every document, scores normalized like top_k"""
+    num_docs = len(index)
+    avg_len = index._total_len / num_docs
+    scores = np.zeros(num_docs)
+    total_idf = 0.0
+    for term in set(tokenize(text)):
+        if term not in index._doc_ids:
+            continue
+        df = len(index._doc_ids[term])
+        idf = np.log(1.0 + (num_docs - df + 0.5) / (df + 0.5))
+        total_idf += idf
+        for doc, tf in zip(index._doc_ids[term], index._tfs[term]):
+            norm = 1.0 - index.b + index.b * index._doc_len[doc] / avg_len
+            scores[doc] += idf * tf * (index.k1 + 1.0) / (tf + index.k1 * norm)
+    top = np.argsort(-scores, kind='stable')[:k]
+    return [min(scores[doc] / total_idf, 1.0) for doc in top if scores[doc] > 0]
+
+
+@pytest.fixture
+def small_cutoffs(monkeypatch):
+    # Small corpus, so lower the cutoffs that decide which terms are looked up or kept dense
+    monkeypatch.setattr(bm25, "HEAVY_DF", 50)
+
+
+@pytest.mark.parametrize("k", [1, 5, 20])
+def test_top_k_matches_exhaustive_scoring(small_cutoffs, k):
+    rng = np.random.default_rng(3)
+    index = BM25Index()
+    index.add(make_texts(rng, 3000))
+    for query in make_texts(rng, 200):
+        results = index.top_k(query, k)
+        assert [round(s, 9) for _, s in results] == [round(s, 9) for s in exhaustive(index, query, k)], query
+
+
+def test_rescores_after_documents_are_added(small_cutoffs):
+    rng = np.random.default_rng(5)
+    index = BM25Index()
+    index.add(make_texts(rng, 1000))
+    queries = make_texts(rng, 50)
+    for query in queries:
+        index.top_k(query, 3)
+    index.add(make_texts(rng, 1000))  # Changes every IDF and the average length
+    for query in queries:
+        assert [round(s, 9) for _, s in index.top_k(query, 3)] == [round(s, 9) for s in exhaustive(index, query, 3)]
+
+
+def test_unknown_or_empty_query():
+    index = BM25Index()
+    assert index.top_k("anything") == []
+    index.add(["how do i join the club"])
+    assert index.top_k("pizza") == []
+    assert index.top_k("the of and") == []
+    assert index.top_k("join club", k=1)[0][0] == 0
@@ -0,0 +1,127 @@
+import json
+import threading
+
+import pytest
+
+from ai.knowledge import EnhancedRAG
+
+FAQS = {
+    "what is supercomputing": "Using very large computers.",
+    "how do i join the club": "Sign up at the front desk.",
+    "when are the club meetings": "Every Friday at 5pm.",
+    "what gpus does the cluster have": "A100s.",
+}
+
+
+def make_rag(tmp_path, engine="tfidf", **kwargs):
+    faq_file = tmp_path / "faqs.json"
+    if not faq_file.exists():
+        faq_file.write_text(json.dumps({"faqs": FAQS}))
+    return EnhancedRAG(faq_file=str(faq_file), index_dir=str(tmp_path / "index"), engine=engine,
+                       shared=False, **kwargs)
+
+
+def wait_for_compaction(rag):
+    if rag._compaction_thread is not None:
+        rag._compaction_thread.join(timeout=10)
+
+
+@pytest.mark.parametrize("engine", EnhancedRAG.ENGINES)
+def test_matches_rewording(tmp_path, engine):
+    rag = make_rag(tmp_path, engine)
+    assert rag.find_best_match("How can I join the club?") == FAQS["how do i join the club"]
+    assert rag.find_best_match("what is supercomputing") == FAQS["what is supercomputing"]
+
+
+@pytest.mark.parametrize("engine", EnhancedRAG.ENGINES)
+def test_added_faq_with_new_words_is_found_immediately(tmp_path, engine):
+    rag = make_rag(tmp_path, engine)
+    rag.add_faq("What is the wifi password in the hall?", "hpc-club-2024")
+    assert rag.find_best_match("wifi password hall") == "hpc-club-2024"
+    wait_for_compaction(rag)
+
+
+def test_journaled_faq_is_found_after_restart(tmp_path):
+    rag = make_rag(tmp_path)
+    rag._maybe_compact = lambda force=False: None  # Leave the entry in the journal
+    rag.add_faq("What is the wifi password in the hall?", "hpc-club-2024")
+
+    restarted = make_rag(tmp_path)
+    assert restarted.find_best_match("wifi password hall") == "hpc-club-2024"
+    wait_for_compaction(restarted)
+
+    # The refit was persisted: the journal is empty and the index matches the snapshot
+    assert not restarted._journal
+    again = make_rag(tmp_path)
+    assert again.find_best_match("wifi password hall") == "hpc-club-2024"
+
+
+def test_known_words_do_not_refit(tmp_path):
+    rag = make_rag(tmp_path)
+    rag.find_best_match("warm up")
+    vectorizer = rag.vectorizer
+    rag.add_faq("when do club meetings start", "5pm sharp.")
+    assert rag.find_best_match("when do club meetings start") == "5pm sharp."
+    assert rag.vectorizer is vectorizer
+
+
+@pytest.mark.parametrize("engine", EnhancedRAG.ENGINES)
+def test_batch_matches_single_lookups(tmp_path, engine):
+    rag = make_rag(tmp_path, engine)
+    questions = ["How can I join the club?", "which gpus are in the cluster", "pizza"]
+    batch = rag.find_best_matches(questions, k=1)
+    for question, matches in zip(questions, batch):
+        single = rag.find_best_match(question)
+        assert (matches[0]["answer"] if matches else None) == single
+
+
+def test_full_vocabulary_does_not_refit(tmp_path):
+    rag = make_rag(tmp_path)
+    rag.find_best_match("warm up")
+    vectorizer = rag.vectorizer
+    vectorizer.max_features = len(vectorizer.vocabulary_)  # As if the cap were reached
+    rag.add_faq("What is the wifi password in the hall?", "hpc-club-2024")
+    rag.find_best_match("wifi password hall")
+    assert rag.vectorizer is vectorizer
+    wait_for_compaction(rag)
+
+
+def test_refits_force_compaction_at_most_once_per_interval(tmp_path):
+    rag = make_rag(tmp_path)
+    fits = []
+    new_vectorizer = rag._new_vectorizer
+    rag._new_vectorizer = lambda *args: fits.append(1) or new_vectorizer(*args)
+    compactions = []
+    compact = rag.compact
+    rag.compact = lambda: compactions.append(1) or compact()
+    for word in ("wifi", "parking", "canteen"):
+        rag.add_faq(f"where is the {word}", f"{word} answer")
+        assert rag.find_best_match(f"{word} location") == f"{word} answer"
+        wait_for_compaction(rag)
+    assert len(fits) == 3  # One in-memory refit per add; the compaction reused the first
+    assert len(compactions) == 1
+    assert [q for q, _ in rag._journal] == ["where is the parking", "where is the canteen"]
+
+
+def test_compaction_writes_files_outside_the_index_lock(tmp_path):
+    rag = make_rag(tmp_path)
+    lock_free = []
+    write_snapshot = rag._write_snapshot
+
+    def try_lock():
+        acquired = rag._lock.acquire(blocking=False)
+        if acquired:
+            rag._lock.release()
+        lock_free.append(acquired)
+
+    def check_lock(raw):
+        probe = threading.Thread(target=try_lock)
+        probe.start()
+        probe.join()
+        return write_snapshot(raw)
+
+    rag._write_snapshot = check_lock
+    rag.add_faq("when do club meetings start", "5pm sharp.")
+    rag.compact()
+    assert lock_free == [True]
+    assert not rag._journal
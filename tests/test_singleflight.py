@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from utils.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_upstream_call():
+    async def main():
+        flight = SingleFlight("test")
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "answer"
+
+        results = await asyncio.gather(*(flight.do("q", work) for _ in range(5)))
+        return flight, calls, results
+
+    flight, calls, results = asyncio.run(main())
+    assert results == ["answer"] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"in_flight": 0, "started": 1, "coalesced": 4}
+
+
+def test_errors_reach_every_caller_and_release_the_key():
+    async def main():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream down")
+
+        results = await asyncio.gather(flight.do("q", fail), flight.do("q", fail), return_exceptions=True)
+
+        async def succeed():
+            return "ok"
+
+        return results, await flight.do("q", succeed), flight
+
+    results, retried, flight = asyncio.run(main())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert retried == "ok"
+    assert flight.started == 2
+
+
+def test_cancelled_follower_does_not_cancel_the_shared_call():
+    async def main():
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        leader = asyncio.create_task(flight.do("q", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("q", work))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await leader
+
+    assert asyncio.run(main()) == "answer"
+
+
+def test_stream_subscribers_get_every_chunk():
+    async def main():
+        flight = SingleFlight()
+        started = []
+
+        async def source():
+            started.append(1)
+            for chunk in ("a", "b", "c"):
+                await asyncio.sleep(0.01)
+                yield chunk
+
+        async def collect():
+            return [chunk async for chunk in flight.stream("q", source)]
+
+        first = [chunk async for chunk in _take(flight.stream("q", source), 1)]
+        late = await collect()  # Joins after chunks were produced
+        rest = await asyncio.gather(collect(), collect())
+        return first, late, rest, started, flight
+
+    first, late, rest, started, flight = asyncio.run(main())
+    assert first == ["a"]
+    assert late == ["a", "b", "c"]
+    assert rest == [["a", "b", "c"]] * 2
+    assert len(started) == 2  # The second pair arrived after the first stream finished
+    assert flight.in_flight() == 0
+
+
+async def _take(stream, count):
+    async for chunk in stream:
+        yield chunk
+        count -= 1
+        if not count:
+            return
@@ -0,0 +1,13 @@
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_importing_app_skips_heavy_dependencies():
+    # Workers import app before serving; the FAQ index and its libraries load in the warmup task
+    code = ("import sys, app; "
+            "print(','.join(m for m in ('numpy', 'scipy', 'sklearn', 'ai.knowledge') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import app as app_module
+
+ALLOWED = {"origin": "http://localhost:5000"}
+
+
+@pytest.fixture
+def client():
+    return TestClient(app_module.app)  # No lifespan: nothing is warmed up
+
+
+def test_foreign_origin_is_refused(client):
+    with pytest.raises(WebSocketDisconnect) as excinfo:
+        with client.websocket_connect("/ws/voice", headers={"origin": "https://evil.example"}) as ws:
+            ws.receive_text()
+    assert excinfo.value.code == 1008
+
+
+@pytest.mark.parametrize("origin", ["http://localhost:5000", "http://localhost:3000", None])
+def test_app_and_dev_server_origins_are_accepted(client, monkeypatch, origin):
+    monkeypatch.setattr(app_module, "transcribe_audio_bytes", lambda audio, filename: "")
+    headers = {"origin": origin} if origin else {}
+    with client.websocket_connect("/ws/voice", headers=headers) as ws:
+        ws.send_text(json.dumps({"type": "start"}))
+        ws.send_bytes(b"ok")
+        ws.send_text(json.dumps({"type": "end"}))
+        assert ws.receive_json() == {"type": "transcript", "text": ""}
+
+
+def test_oversized_utterance_is_dropped_until_next_start(client, monkeypatch):
+    transcribed = []
+    monkeypatch.setattr(app_module, "MAX_FILE_SIZE", 10)
+    monkeypatch.setattr(app_module, "transcribe_audio_bytes", lambda audio, filename: transcribed.append(audio) or "")
+
+    with client.websocket_connect("/ws/voice", headers=ALLOWED) as ws:
+        ws.send_text(json.dumps({"type": "start"}))
+        ws.send_bytes(b"a" * 8)
+        ws.send_bytes(b"b" * 8)  # Over the limit
+        ws.send_bytes(b"c" * 4)  # Tail of the rejected utterance
+        assert ws.receive_json() == {"type": "error", "detail": "Audio too large"}
+        ws.send_text(json.dumps({"type": "end"}))
+
+        ws.send_text(json.dumps({"type": "start"}))
+        ws.send_bytes(b"ok")
+        ws.send_text(json.dumps({"type": "end"}))
+        assert ws.receive_json() == {"type": "transcript", "text": ""}
+
+    assert transcribed == [b"ok"]
@@ -104,6 +104,9 @@ import tempfile
 import subprocess
 import sys
 import platform
+from utils.log import get_logger
+
+logger = get_logger(__name__)
 
 try:
     from pydub import AudioSegment
@@ -119,26 +122,26 @@ def play_audio(path):
     Robust audio playback with multiple fallback methods.
     This is the safest approach for Linux systems.
     """
-    print("🎵 Playing audio...")
+    logger.info("Playing audio...")
     
     # Method 1: Try system audio players (most reliable)
     if try_system_players(path):
-        print("✅ Playback completed with system player.")
+        logger.info("Playback completed with system player.")
         return
     
     # Method 2: Try simpleaudio for WAV files
     if try_simpleaudio(path):
-        print("✅ Playback completed with simpleaudio.")
+        logger.info("Playback completed with simpleaudio.")
         return
     
     # Method 3: Convert to WAV and try again
     if convert_and_play(path):
-        print("✅ Playback completed after conversion.")
+        logger.info("Playback completed after conversion.")
         return
     
     # Final fallback
-    print("❌ All audio playback methods failed.")
-    print("💡 Audio was generated but couldn't be played.")
+    logger.error("All audio playback methods failed.")
+    logger.info("Audio was generated but couldn't be played.")
 
 def try_system_players(path):
     """Try using system audio players - cross-platform"""
@@ -182,7 +185,7 @@ def try_system_players(path):
                         continue
         return False
     except Exception as e:
-        print(f"❌ System player error: {e}")
+        logger.error("System player error: %s", e)
         return False
 
 def try_simpleaudio(path):
@@ -199,10 +202,10 @@ def try_simpleaudio(path):
         return True
         
     except ImportError:
-        print("💡 simpleaudio not available")
+        logger.info("simpleaudio not available")
         return False
     except Exception as e:
-        print(f"❌ simpleaudio error: {e}")
+        logger.error("simpleaudio error: %s", e)
         return False
 
 def convert_and_play(path):
@@ -222,7 +225,7 @@ def convert_and_play(path):
         os.unlink(wav_path)
         return False
     except Exception as e:
-        print(f"❌ Audio conversion error: {e}")
+        logger.error("Audio conversion error: %s", e)
         return False
 
 def check_audio_dependencies():
@@ -0,0 +1,35 @@
+"""Thread-safe lazy construction for heavy module-level objects"""
+import threading
+from typing import Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class Lazy(Generic[T]):
+    """
+    Build an object on first use instead of at import time.
+
+    ``get()`` runs the factory exactly once even when several threads ask at
+    the same moment; later calls return the cached instance.
+    """
+
+    def __init__(self, factory: Callable[[], T], name: str = ""):
+        self._factory = factory
+        self.name = name or getattr(factory, "__name__", "lazy")
+        self._value = None
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        if self._ready:
+            return self._value
+        with self._lock:
+            if not self._ready:
+                self._value = self._factory()
+                self._ready = True
+        return self._value
+
+    @property
+    def ready(self) -> bool:
+        """True once the object has been built"""
+        return self._ready
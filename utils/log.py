@@ -0,0 +1,189 @@
+"""
+Non-blocking structured logging.
+
+Every module logs through ``get_logger(__name__)``. Records are put on an
+in-memory queue by a QueueHandler - the only work done on the event loop or a
+request thread - and a QueueListener thread formats and writes them, so a slow
+terminal or a full pipe never stalls a request.
+
+Records carry the current request ID (``bind_request_id``; a contextvar, so it
+follows ``asyncio.to_thread`` and tasks). Per-request DEBUG lines are kept for
+a sampled fraction of requests (``LOG_SAMPLE_RATE``), whole requests at a
+time, so a sampled request can be followed end to end.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import uuid
+import zlib
+from contextvars import ContextVar
+from typing import Optional
+
+from config import LOG_FORMAT, LOG_LEVEL, LOG_SAMPLE_RATE
+
+ROOT_LOGGER = "riva"
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+# LogRecord attributes that are not user-supplied ``extra`` fields
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def bind_request_id(request_id: Optional[str] = None) -> str:
+    """Tag log records in the current context (and tasks/threads started from it) with a request ID"""
+    request_id = request_id or new_request_id()
+    _request_id.set(request_id)
+    return request_id
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def _sampled(request_id: Optional[str], rate: float) -> bool:
+    """Stable per-request decision, so every debug line of a sampled request is kept"""
+    if rate >= 1:
+        return True
+    if rate <= 0 or request_id is None:
+        return False
+    return zlib.crc32(request_id.encode()) % 10000 < rate * 10000
+
+
+class _ContextFilter(logging.Filter):
+    """Attach the request ID and drop DEBUG records of unsampled requests"""
+
+    def __init__(self, level: int, sample_rate: float):
+        super().__init__()
+        self.level = level
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get() or "-"
+        if record.levelno >= self.level:
+            return True
+        return _sampled(_request_id.get(), self.sample_rate)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including ``extra={...}`` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                entry[key] = value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records untouched; formatting (and tracebacks) happen on the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info and not record.exc_text:
+            # Tracebacks cannot cross threads lazily: render them now, everything else later
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware binding a request ID to every HTTP request and WebSocket session.
+
+    An incoming ``X-Request-ID`` is reused (so IDs can be traced across
+    services), otherwise one is generated; HTTP responses echo it back.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+        incoming = dict(scope.get("headers") or []).get(b"x-request-id", b"").decode("latin-1").strip()[:64]
+        request_id = bind_request_id(incoming or None)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers") or []) + [(b"x-request-id", request_id.encode())]
+            await send(message)
+
+        await self.app(scope, receive, send_with_id)
+
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, sample_rate: float = LOG_SAMPLE_RATE,
+                  stream=None):
+    """
+    Route the ``riva`` logger through a queue to a background writer thread (idempotent).
+
+    Args:
+        level: Minimum level always logged (e.g. "INFO")
+        fmt: "text" or "json"
+        sample_rate: Fraction of requests whose DEBUG lines are also logged
+        stream: Output stream (default stdout)
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+        level_no = logging.getLevelName(level.upper()) if isinstance(level, str) else level
+        if not isinstance(level_no, int):
+            level_no = logging.INFO
+
+        output = logging.StreamHandler(stream or sys.stdout)
+        if fmt == "json":
+            output.setFormatter(JsonFormatter())
+        else:
+            output.setFormatter(logging.Formatter(
+                "%(asctime)s %(levelname)-5s %(name)s [%(request_id)s] %(message)s", "%H:%M:%S"))
+
+        records = queue.SimpleQueue()
+        handler = _QueueHandler(records)
+        handler.addFilter(_ContextFilter(level_no, sample_rate))
+
+        logger = logging.getLogger(ROOT_LOGGER)
+        logger.handlers[:] = [handler]
+        logger.setLevel(logging.DEBUG if sample_rate > 0 else level_no)
+        logger.propagate = False
+
+        _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Return a logger under ``riva`` (e.g. ``riva.audio.tts``), setting up logging on first use.
+
+    Args:
+        name: Usually ``__name__``
+    """
+    setup_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
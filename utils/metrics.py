@@ -0,0 +1,184 @@
+"""
+Lightweight in-process metrics exposed in Prometheus text format.
+
+Counters and histograms are plain Python objects guarded by a lock - cheap
+enough for the request path and free of dependencies. ``span(stage)`` times a
+block of code into ``riva_stage_seconds``; app.py serves ``render()`` at
+/metrics. Each uvicorn worker keeps its own numbers.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (4096, 16384, 65536, 131072, 262144, 524288, 1048576, 4194304)
+RATE_BUCKETS = (5, 10, 20, 40, 60, 80, 120, 200, 400)
+
+_registry: List["_Metric"] = []
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}  # {labels: [bucket counts..., sum, count]}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self, **labels) -> Tuple[float, int]:
+        """Return (sum, count) for one label set"""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return (series[-2], series[-1]) if series else (0.0, 0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    labels = _format_labels(self.labelnames, key, f'le="{_format_value(float(bound))}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+                plain = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{plain} {_format_value(float(series[-2]))}")
+                lines.append(f"{self.name}_count{plain} {series[-1]}")
+        return lines
+
+
+def render() -> str:
+    """All registered metrics in Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Pipeline metrics
+STAGE_SECONDS = Histogram("riva_stage_seconds", "Time spent in each pipeline stage", ["stage"])
+STAGE_ERRORS = Counter("riva_stage_errors_total", "Pipeline stages that raised", ["stage"])
+FAQ_LOOKUPS = Counter("riva_faq_lookups_total", "FAQ lookups by result", ["result"])
+ANSWER_CACHE_LOOKUPS = Counter("riva_answer_cache_lookups_total", "Semantic answer cache lookups by result", ["result"])
+LLM_TTFT = Histogram("riva_llm_ttft_seconds", "Time from LLM request to first streamed token")
+LLM_TOKEN_RATE = Histogram("riva_llm_tokens_per_second", "Streamed chunks per second after the first token",
+                           buckets=RATE_BUCKETS)
+LLM_TOKENS = Counter("riva_llm_tokens_total", "Streamed LLM chunks (about one token each)")
+TTS_SECONDS = Histogram("riva_tts_seconds", "Speech synthesis time per provider call", ["provider"])
+TTS_AUDIO_BYTES = Histogram("riva_tts_audio_bytes", "Synthesized audio size per clip", ["provider"],
+                            buckets=BYTES_BUCKETS)
+TTS_FAILURES = Counter("riva_tts_failures_total", "Failed speech synthesis calls", ["provider"])
+AUDIO_STORE_LOOKUPS = Counter("riva_audio_store_lookups_total", "Audio store lookups by result", ["result"])
+
+
+@contextmanager
+def span(stage: str):
+    """Time the enclosed block into riva_stage_seconds{stage}, counting exceptions"""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+class LLMStreamTimer:
+    """Record TTFT, total time and token rate of one streamed LLM answer"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first = None
+        self.tokens = 0
+
+    def token(self):
+        if self.first is None:
+            self.first = time.perf_counter()
+            LLM_TTFT.observe(self.first - self.start)
+        self.tokens += 1
+
+    def finish(self, failed: bool = False):
+        end = time.perf_counter()
+        STAGE_SECONDS.observe(end - self.start, stage="llm")
+        if failed:
+            STAGE_ERRORS.inc(stage="llm")
+        LLM_TOKENS.inc(self.tokens)
+        if self.first is not None and self.tokens > 1 and end > self.first:
+            LLM_TOKEN_RATE.observe((self.tokens - 1) / (end - self.first))
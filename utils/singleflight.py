@@ -0,0 +1,141 @@
+"""
+Single-flight coalescing for concurrent identical requests.
+
+When several clients ask for the same thing at the same moment, only the first
+request starts the upstream work; the others attach to it. Streams are
+broadcast: every subscriber receives every chunk, including chunks produced
+before it joined. A key is released as soon as its work finishes, so nothing
+is cached beyond the lifetime of the in-flight call.
+"""
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Dict, Hashable, List, TypeVar
+
+T = TypeVar("T")
+
+
+class _Broadcast:
+    """Chunks of one in-flight stream, replayable by any number of subscribers"""
+
+    def __init__(self):
+        self.chunks: List = []
+        self.done = False
+        self.error = None
+        self._changed = asyncio.Condition()
+
+    async def publish(self, chunk):
+        async with self._changed:
+            self.chunks.append(chunk)
+            self._changed.notify_all()
+
+    async def finish(self, error: BaseException = None):
+        async with self._changed:
+            self.done = True
+            self.error = error
+            self._changed.notify_all()
+
+    async def iterate(self) -> AsyncIterator:
+        position = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: position < len(self.chunks) or self.done)
+                pending = self.chunks[position:]
+                done, error = self.done, self.error
+            for chunk in pending:
+                yield chunk
+            position += len(pending)
+            if done and position >= len(self.chunks):
+                if error is not None:
+                    raise error
+                return
+
+
+class SingleFlight:
+    def __init__(self, name: str = ""):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self._streams: Dict[Hashable, _Broadcast] = {}
+        self._tasks = set()  # Strong references to running stream pumps
+        self.started = 0  # Upstream calls actually made
+        self.coalesced = 0  # Requests served by joining a call already in flight
+
+    async def do(self, key: Hashable, work: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run ``work()`` once per key at a time; concurrent callers with the same key share its result.
+
+        Args:
+            key: Identity of the request (e.g. normalized question)
+            work: Coroutine factory, only called by the first caller
+
+        Returns:
+            The result of the shared call (exceptions propagate to every caller)
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.started += 1
+        try:
+            result = await work()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved so an unjoined failure is not logged twice
+            raise
+        finally:
+            self._calls.pop(key, None)
+
+    def stream(self, key: Hashable, source: Callable[[], AsyncIterator]) -> AsyncIterator:
+        """
+        Subscribe to a shared stream, starting ``source()`` if no identical stream is in flight.
+
+        The upstream stream runs in its own task, so it completes even if the
+        subscriber that started it disconnects.
+
+        Args:
+            key: Identity of the request
+            source: Async iterator factory, only called for the first subscriber
+                (synchronously, so it can register per-flight state before returning)
+
+        Returns:
+            Async iterator over every chunk of the shared stream
+        """
+        broadcast = self._streams.get(key)
+        if broadcast is not None:
+            self.coalesced += 1
+        else:
+            broadcast = _Broadcast()
+            self._streams[key] = broadcast
+            self.started += 1
+            task = asyncio.get_running_loop().create_task(self._pump(key, broadcast, source()))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return broadcast.iterate()
+
+    async def _pump(self, key: Hashable, broadcast: _Broadcast, source: AsyncIterator):
+        error = None
+        try:
+            async for chunk in source:
+                await broadcast.publish(chunk)
+        except Exception as e:
+            error = e
+        finally:
+            # Release the key first: requests arriving from now on start a fresh call
+            if self._streams.get(key) is broadcast:
+                del self._streams[key]
+            await broadcast.finish(error)
+
+    def in_flight(self) -> int:
+        """Number of keys with work currently running"""
+        return len(self._calls) + len(self._streams)
+
+    def stats(self) -> dict:
+        """Return upstream vs coalesced request counters"""
+        return {
+            "in_flight": self.in_flight(),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
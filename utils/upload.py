@@ -0,0 +1,175 @@
+"""
+In-memory audio uploads.
+
+The request body is read chunk by chunk into a BytesIO - either a raw audio
+body or the file part of a multipart/form-data body, parsed incrementally - so
+uploads never touch disk and never exist as base64. The size limit and the
+allowed extensions are enforced while the bytes arrive: an oversized or
+unsupported upload is rejected before the rest of it is read.
+"""
+import io
+import os
+from typing import AsyncIterator, Optional, Tuple
+
+from security_config import MAX_FILE_SIZE, validate_audio_extension
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+# Extension sent to Whisper for raw bodies without a filename
+AUDIO_CONTENT_TYPES = {
+    "audio/wav": ".wav",
+    "audio/x-wav": ".wav",
+    "audio/wave": ".wav",
+    "audio/flac": ".flac",
+    "audio/x-flac": ".flac",
+    "audio/mpeg": ".mp3",
+    "audio/mp4": ".m4a",
+    "audio/x-m4a": ".m4a",
+    "audio/ogg": ".ogg",
+    "audio/opus": ".ogg",  # Whisper takes Opus in an Ogg container, not a .opus name
+    "audio/webm": ".webm",
+}
+
+
+class UploadError(Exception):
+    """Rejected upload, carrying the HTTP status to answer with"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def audio_filename(filename: Optional[str], content_type: str = "") -> str:
+    """
+    Name the upload for the transcription client, whose extension tells it the format.
+
+    Args:
+        filename: Client-supplied name, if any (directories are stripped)
+        content_type: Content type used when there is no name
+
+    Raises:
+        UploadError: 415 if the format is not in ALLOWED_AUDIO_EXTENSIONS
+    """
+    if filename:
+        filename = os.path.basename(filename.replace("\\", "/"))
+    else:
+        extension = AUDIO_CONTENT_TYPES.get(content_type.split(";")[0].strip().lower())
+        filename = f"audio{extension}" if extension else ""
+    if not filename or not validate_audio_extension(filename):
+        raise UploadError(415, "Unsupported audio format")
+    return filename
+
+
+async def read_audio_upload(chunks: AsyncIterator[bytes], content_type: str,
+                            filename: Optional[str] = None, content_length: Optional[str] = None,
+                            max_size: int = MAX_FILE_SIZE) -> Tuple[str, io.BytesIO]:
+    """
+    Read an audio upload into memory.
+
+    Args:
+        chunks: Request body stream (e.g. ``request.stream()``)
+        content_type: Request Content-Type; multipart bodies use their first file part
+        filename: Name for a raw body (e.g. from the query string)
+        content_length: Declared body size, rejected up front when over the limit
+        max_size: Maximum audio size in bytes
+
+    Returns:
+        (filename, buffer positioned at the start)
+
+    Raises:
+        UploadError: 413 when too large, 415 for other formats, 400 when empty or malformed
+    """
+    if content_length and content_length.isdigit() and int(content_length) > max_size + 64 * 1024:
+        raise UploadError(413, "Audio file too large")  # Allowance for multipart framing
+
+    if content_type.lower().startswith("multipart/form-data"):
+        filename, buffer = await _read_multipart(chunks, content_type, max_size)
+    else:
+        filename = audio_filename(filename, content_type)
+        buffer = io.BytesIO()
+        async for chunk in chunks:
+            if buffer.tell() + len(chunk) > max_size:
+                raise UploadError(413, "Audio file too large")
+            buffer.write(chunk)
+
+    if not buffer.tell():
+        raise UploadError(400, "No audio data provided")
+    buffer.seek(0)
+    return filename, buffer
+
+
+async def _read_multipart(chunks: AsyncIterator[bytes], content_type: str,
+                          max_size: int) -> Tuple[str, io.BytesIO]:
+    """Stream a multipart body, keeping only the first part that carries a filename"""
+    _, params = parse_options_header(content_type)
+    boundary = params.get(b"boundary")
+    if not boundary:
+        raise UploadError(400, "Missing multipart boundary")
+
+    buffer = io.BytesIO()
+    state = {"field": b"", "value": b"", "headers": {}, "capturing": False, "filename": None, "error": None}
+
+    def on_part_begin():
+        state["headers"] = {}
+
+    def on_header_field(data, start, end):
+        state["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["value"] += data[start:end]
+
+    def on_header_end():
+        state["headers"][state["field"].lower()] = state["value"]
+        state["field"], state["value"] = b"", b""
+
+    def on_headers_finished():
+        if state["filename"] is not None:
+            return  # Only the first file part is kept
+        _, options = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        name = options.get(b"filename")
+        if name is None:
+            return
+        try:
+            state["filename"] = audio_filename(name.decode("utf-8", "replace"),
+                                               state["headers"].get(b"content-type", b"").decode("latin-1"))
+            state["capturing"] = True
+        except UploadError as e:
+            state["error"] = e
+
+    def on_part_data(data, start, end):
+        if not state["capturing"]:
+            return
+        if buffer.tell() + (end - start) > max_size:
+            state["error"] = UploadError(413, "Audio file too large")
+            state["capturing"] = False
+            return
+        buffer.write(data[start:end])
+
+    def on_part_end():
+        state["capturing"] = False
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    async for chunk in chunks:
+        try:
+            parser.write(chunk)
+        except Exception as e:
+            raise UploadError(400, f"Malformed multipart body: {e}")
+        if state["error"]:
+            raise state["error"]
+    parser.finalize()
+
+    if state["filename"] is None:
+        raise UploadError(400, "No audio file in form data")
+    return state["filename"], buffer